@@ -1,39 +1,64 @@
 # backend/agents/cross_examiner_agent.py
 
-import os
-from openai import OpenAI
-from backend.retriever import LegalRetriever
-from dotenv import load_dotenv
+import asyncio
+from backend.context_packer import ContextPacker
+from backend.trial_retrieval import retrieve_across
+from backend.tracing import span
+from backend.llm_client import chat_completion, chat_completion_async, stream_chat_completion, collect_stream
 
 
 class CrossExaminerAgent:
     def __init__(self):
-        load_dotenv()
-        self.client = OpenAI(
-            api_key=os.getenv("GROQ_API_KEY"),
-            base_url="https://api.groq.com/openai/v1" 
-        )
         self.model = "llama3-70b-8192"
+        self.context = ContextPacker("cross_examiner")
 
-    def examine(self, prosecution_argument, defense_argument):
+    def examine(self, prosecution_argument, defense_argument, on_token=None):
         """
         Analyze both sides' arguments and generate targeted questions.
+
+        If on_token is given, the reply is streamed and each text delta is passed to it.
         """
         print("[🔍] Cross-Examiner analyzing arguments...")
         combined_input = self._combine_arguments(prosecution_argument, defense_argument)
+        retrieved_sections = self._retrieve_sections(combined_input)
 
-        # Retrieve relevant sections from all documents
-        ipc_retriever = LegalRetriever(document_type="ipc")
-        evidence_retriever = LegalRetriever(document_type="evidence_act")
+        with span("prompt_build"):
+            prompt = self._construct_prompt(prosecution_argument, defense_argument, retrieved_sections)
+        if on_token:
+            response = collect_stream(self._call_groq_api(prompt, stream=True), on_token)
+        else:
+            response = self._call_groq_api(prompt)
+
+        return self._format_examination(prosecution_argument, defense_argument, retrieved_sections, response)
+
+    async def examine_async(self, prosecution_argument, defense_argument):
+        """
+        Async version of examine; retrieval runs in a worker thread.
+        """
+        print("[🔍] Cross-Examiner analyzing arguments...")
+        combined_input = self._combine_arguments(prosecution_argument, defense_argument)
+        retrieved_sections = await asyncio.to_thread(self._retrieve_sections, combined_input)
+
+        with span("prompt_build"):
+            prompt = self._construct_prompt(prosecution_argument, defense_argument, retrieved_sections)
+        response = await self._call_groq_api_async(prompt)
 
-        ipc_results = ipc_retriever.retrieve(combined_input, top_k=1)
-        evidence_results = evidence_retriever.retrieve(combined_input, top_k=1)
+        return self._format_examination(prosecution_argument, defense_argument, retrieved_sections, response)
 
-        retrieved_sections = ipc_results + evidence_results
+    def planned_requests(self, crime_description):
+        """Retrieval requests known before the trial starts: none, both queries quote the arguments."""
+        return []
 
-        prompt = self._construct_prompt(prosecution_argument, defense_argument, retrieved_sections)
-        response = self._call_groq_api(prompt)
+    def _retrieve_sections(self, combined_input):
+        # Retrieve relevant sections from all documents
+        ipc_results, evidence_results = retrieve_across([
+            ("ipc", combined_input, 1),
+            ("evidence_act", combined_input, 1)
+        ])
+
+        return ipc_results + evidence_results
 
+    def _format_examination(self, prosecution_argument, defense_argument, retrieved_sections, response):
         return {
             "role": "Cross-Examiner",
             "prosecution_summary": prosecution_argument["argument"][:300],
@@ -43,13 +68,10 @@ class CrossExaminerAgent:
         }
 
     def _combine_arguments(self, p, d):
-        return f"Prosecution: {p['crime_description']} - {p['argument'][:200]} | Defense: {d['argument'][:200]}"
+        return f"Prosecution: {p['crime_description']} - {self.context.truncate(p['argument'])} | Defense: {self.context.truncate(d['argument'])}"
 
     def _construct_prompt(self, p_arg, d_arg, sections):
-        context = "\n\n".join([
-            f"[{sec['doc_type']} Section {sec['section_id']}]: {sec['title']}\n{sec['content']}"
-            for sec in sections
-        ])
+        context = self.context.pack(sections)
 
         prompt = f"""
 You are the **Cross-Examiner Agent** in a mock courtroom simulation.
@@ -57,10 +79,10 @@ You are the **Cross-Examiner Agent** in a mock courtroom simulation.
 Your task is to critically analyze the arguments from both sides and generate targeted questions that challenge inconsistencies, assumptions, or legal misinterpretations.
 
 Prosecution Argument Summary:
-"{p_arg['argument'][:300]}..."
+"{self.context.truncate(p_arg['argument'])}"
 
 Defense Argument Summary:
-"{d_arg['argument'][:300]}..."
+"{self.context.truncate(d_arg['argument'])}"
 
 Relevant Legal Provisions:
 {context}
@@ -71,17 +93,22 @@ Focus on areas where the facts or law may be unclear, disputed, or incomplete.
 
         return prompt
 
-    def _call_groq_api(self, prompt):
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are an experienced Cross-Examiner in a legal trial."},
-                    {"role": "user", "content": prompt}
-                ],
-                model=self.model,
-                temperature=0.5,
-                max_tokens=400
-            )
-            return chat_completion.choices[0].message.content.strip()
-        except Exception as e:
-            return f"[Error] Failed to get response from Groq API: {str(e)}"
\ No newline at end of file
+    def _build_messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are an experienced Cross-Examiner in a legal trial."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _call_groq_api(self, prompt, stream=False):
+        """
+        Call the model; with stream=True, return an iterator of text deltas instead.
+
+        Raises:
+            LLMCallError: If the API call fails after retries
+        """
+        if stream:
+            return stream_chat_completion(self._build_messages(prompt), self.model, temperature=0.5, max_tokens=400)
+        return chat_completion(self._build_messages(prompt), self.model, temperature=0.5, max_tokens=400)
+
+    async def _call_groq_api_async(self, prompt):
+        return await chat_completion_async(self._build_messages(prompt), self.model, temperature=0.5, max_tokens=400)
@@ -1,41 +1,69 @@
 # backend/agents/judge_agent.py
 
-import os
-from openai import OpenAI
-from backend.retriever import LegalRetriever
-from dotenv import load_dotenv
+import asyncio
+from backend.context_packer import ContextPacker
+from backend.trial_retrieval import retrieve_across
+from backend.tracing import span
+from backend.llm_client import chat_completion, chat_completion_async, stream_chat_completion, collect_stream
 
 
 class JudgeAgent:
     def __init__(self):
-        load_dotenv()
-        self.client = OpenAI(
-            api_key=os.getenv("GROQ_API_KEY"),
-            base_url="https://api.groq.com/openai/v1" 
-        )
         self.model = "llama3-70b-8192"
+        self.context = ContextPacker("judge")
 
-    def render_verdict(self, prosecution_case, defense_case, cross_examination_questions):
+    def render_verdict(self, prosecution_case, defense_case, cross_examination_questions, on_token=None):
         """
         Render a verdict based on all inputs.
+
+        If on_token is given, the reply is streamed and each text delta is passed to it.
         """
         print("[⚖️] Judge reviewing case details...")
         combined_input = self._combine_inputs(prosecution_case, defense_case, cross_examination_questions)
+        retrieved_sections = self._retrieve_sections(combined_input)
 
-        # Retrieve relevant sections from all documents
-        ipc_retriever = LegalRetriever(document_type="ipc")
-        crpc_retriever = LegalRetriever(document_type="crpc")
-        evidence_retriever = LegalRetriever(document_type="evidence_act")
+        with span("prompt_build"):
+            prompt = self._construct_prompt(prosecution_case, defense_case, cross_examination_questions, retrieved_sections)
+        if on_token:
+            response = collect_stream(self._call_groq_api(prompt, stream=True), on_token)
+        else:
+            response = self._call_groq_api(prompt)
+
+        return self._format_verdict(combined_input, retrieved_sections, response)
+
+    async def render_verdict_async(self, prosecution_case, defense_case, cross_examination_questions):
+        """
+        Async version of render_verdict; retrieval runs in a worker thread.
+        """
+        print("[⚖️] Judge reviewing case details...")
+        combined_input = self._combine_inputs(prosecution_case, defense_case, cross_examination_questions)
+        retrieved_sections = await asyncio.to_thread(self._retrieve_sections, combined_input)
+
+        with span("prompt_build"):
+            prompt = self._construct_prompt(prosecution_case, defense_case, cross_examination_questions, retrieved_sections)
+        response = await self._call_groq_api_async(prompt)
+
+        return self._format_verdict(combined_input, retrieved_sections, response)
 
-        ipc_results = ipc_retriever.retrieve(combined_input, top_k=2)
-        crpc_results = crpc_retriever.retrieve("criminal procedure", top_k=1)
-        evidence_results = evidence_retriever.retrieve("burden of proof", top_k=1)
+    def planned_requests(self, crime_description):
+        """
+        Retrieval requests known before the trial starts (see backend/trial_retrieval.py):
+        the fixed CrPC and Evidence Act queries. The IPC query quotes the arguments.
+        """
+        return [
+            ("crpc", "criminal procedure", 1),
+            ("evidence_act", "burden of proof", 1)
+        ]
 
-        retrieved_sections = ipc_results + crpc_results + evidence_results
+    def _retrieve_sections(self, combined_input):
+        # Retrieve relevant sections from all documents
+        ipc_results, crpc_results, evidence_results = retrieve_across(
+            [("ipc", combined_input, 2)] + self.planned_requests(combined_input)
+        )
 
-        prompt = self._construct_prompt(prosecution_case, defense_case, cross_examination_questions, retrieved_sections)
-        response = self._call_groq_api(prompt)
+        return ipc_results + crpc_results + evidence_results
 
+    def _format_verdict(self, combined_input, retrieved_sections, response):
         return {
             "role": "Judge",
             "summary_input": combined_input[:500],
@@ -44,13 +72,15 @@ class JudgeAgent:
         }
 
     def _combine_inputs(self, p, d, x):
-        return f"{p['crime_description']} | {p['argument'][:200]} | {d['argument'][:200]} | {x['questions'][:200]}"
+        return " | ".join([
+            p["crime_description"],
+            self.context.truncate(p["argument"]),
+            self.context.truncate(d["argument"]),
+            self.context.truncate(x["questions"])
+        ])
 
     def _construct_prompt(self, p_arg, d_arg, x_questions, sections):
-        context = "\n\n".join([
-            f"[{sec['doc_type']} Section {sec['section_id']}]: {sec['title']}\n{sec['content']}"
-            for sec in sections
-        ])
+        context = self.context.pack(sections)
 
         prompt = f"""
 You are the **Judge Agent** in a mock courtroom simulation.
@@ -61,13 +91,13 @@ Crime Description:
 "{p_arg['crime_description']}"
 
 Prosecution Argument:
-"{p_arg['argument'][:300]}..."
+"{self.context.truncate(p_arg['argument'])}"
 
 Defense Argument:
-"{d_arg['argument'][:300]}..."
+"{self.context.truncate(d_arg['argument'])}"
 
 Cross-Examination Questions:
-"{x_questions['questions'][:300]}..."
+"{self.context.truncate(x_questions['questions'])}"
 
 Relevant Legal Provisions:
 {context}
@@ -82,17 +112,22 @@ Cite specific sections and weigh both sides' arguments carefully.
 
         return prompt
 
-    def _call_groq_api(self, prompt):
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a respected Judge issuing a legally sound verdict."},
-                    {"role": "user", "content": prompt}
-                ],
-                model=self.model,
-                temperature=0.2,
-                max_tokens=600
-            )
-            return chat_completion.choices[0].message.content.strip()
-        except Exception as e:
-            return f"[Error] Failed to get response from Groq API: {str(e)}"
\ No newline at end of file
+    def _build_messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are a respected Judge issuing a legally sound verdict."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _call_groq_api(self, prompt, stream=False):
+        """
+        Call the model; with stream=True, return an iterator of text deltas instead.
+
+        Raises:
+            LLMCallError: If the API call fails after retries
+        """
+        if stream:
+            return stream_chat_completion(self._build_messages(prompt), self.model, temperature=0.2, max_tokens=600)
+        return chat_completion(self._build_messages(prompt), self.model, temperature=0.2, max_tokens=600)
+
+    async def _call_groq_api_async(self, prompt):
+        return await chat_completion_async(self._build_messages(prompt), self.model, temperature=0.2, max_tokens=600)
@@ -1,46 +1,70 @@
 # backend/agents/prosecution_agent.py
 
-import os
-from openai import OpenAI
-from backend.retriever import LegalRetriever
-from dotenv import load_dotenv
+import asyncio
+from backend.context_packer import ContextPacker
+from backend.trial_retrieval import retrieve_across
+from backend.tracing import span
+from backend.llm_client import chat_completion, chat_completion_async, stream_chat_completion, collect_stream
 
 
 class ProsecutionAgent:
     def __init__(self):
-        load_dotenv()
-        self.client = OpenAI(
-            api_key=os.getenv("GROQ_API_KEY"),
-            base_url="https://api.groq.com/openai/v1" 
-        )
         self.model = "llama3-70b-8192"
+        self.context = ContextPacker("prosecution")
 
-    def build_case(self, crime_description):
+    def build_case(self, crime_description, on_token=None):
         """
         Build a prosecution case using relevant legal provisions.
+
+        If on_token is given, the reply is streamed and each text delta is passed to it.
+        """
+        print("[🔍] Prosecution Agent retrieving relevant sections...")
+        sections = self._retrieve_sections(crime_description)
+
+        with span("prompt_build"):
+            prompt = self._construct_prompt(crime_description, sections)
+        if on_token:
+            response = collect_stream(self._call_groq_api(prompt, stream=True), on_token)
+        else:
+            response = self._call_groq_api(prompt)
+
+        return self._format_case(crime_description, sections, response)
+
+    async def build_case_async(self, crime_description):
+        """
+        Async version of build_case; retrieval runs in a worker thread.
         """
         print("[🔍] Prosecution Agent retrieving relevant sections...")
-        ipc_retriever = LegalRetriever(document_type="ipc")
-        crpc_retriever = LegalRetriever(document_type="crpc")
+        sections = await asyncio.to_thread(self._retrieve_sections, crime_description)
+
+        with span("prompt_build"):
+            prompt = self._construct_prompt(crime_description, sections)
+        response = await self._call_groq_api_async(prompt)
 
-        ipc_results = ipc_retriever.retrieve(crime_description, top_k=2)
-        crpc_results = crpc_retriever.retrieve("arrest and procedure", top_k=1)
+        return self._format_case(crime_description, sections, response)
 
-        prompt = self._construct_prompt(crime_description, ipc_results + crpc_results)
-        response = self._call_groq_api(prompt)
+    def planned_requests(self, crime_description):
+        """Retrieval requests known before the trial starts (see backend/trial_retrieval.py)."""
+        return [
+            ("ipc", crime_description, 2),
+            ("crpc", "arrest and procedure", 1)
+        ]
 
+    def _retrieve_sections(self, crime_description):
+        ipc_results, crpc_results = retrieve_across(self.planned_requests(crime_description))
+
+        return ipc_results + crpc_results
+
+    def _format_case(self, crime_description, sections, response):
         return {
             "role": "Prosecution",
             "crime_description": crime_description,
-            "retrieved_sections": ipc_results + crpc_results,
+            "retrieved_sections": sections,
             "argument": response
         }
 
     def _construct_prompt(self, crime_description, sections):
-        context = "\n\n".join([
-            f"[{sec['doc_type']} Section {sec['section_id']}]: {sec['title']}\n{sec['content']}"
-            for sec in sections
-        ])
+        context = self.context.pack(sections)
 
         prompt = f"""
 You are the **Prosecution Agent** in a mock courtroom simulation. Your task is to construct a compelling legal argument based on the Indian Penal Code (IPC), Code of Criminal Procedure (CrPC), and other applicable laws.
@@ -60,17 +84,22 @@ Ensure your argument clearly references section numbers and legal definitions.
 
         return prompt
 
-    def _call_groq_api(self, prompt):
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a skilled Prosecution Lawyer assisting in a mock courtroom simulation."},
-                    {"role": "user", "content": prompt}
-                ],
-                model=self.model,
-                temperature=0.3,
-                max_tokens=512
-            )
-            return chat_completion.choices[0].message.content.strip()
-        except Exception as e:
-            return f"[Error] Failed to get response from Groq API: {str(e)}"
\ No newline at end of file
+    def _build_messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are a skilled Prosecution Lawyer assisting in a mock courtroom simulation."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _call_groq_api(self, prompt, stream=False):
+        """
+        Call the model; with stream=True, return an iterator of text deltas instead.
+
+        Raises:
+            LLMCallError: If the API call fails after retries
+        """
+        if stream:
+            return stream_chat_completion(self._build_messages(prompt), self.model, temperature=0.3, max_tokens=512)
+        return chat_completion(self._build_messages(prompt), self.model, temperature=0.3, max_tokens=512)
+
+    async def _call_groq_api_async(self, prompt):
+        return await chat_completion_async(self._build_messages(prompt), self.model, temperature=0.3, max_tokens=512)
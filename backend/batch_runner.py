@@ -0,0 +1,178 @@
+# backend/batch_runner.py
+
+"""
+Run many mock trials from a JSONL file with bounded concurrency.
+
+Each input line is {"id": ..., "crime_description": ...} ("id" is optional).
+Results are appended to the output JSONL as each trial finishes, and the
+output doubles as the checkpoint: rerunning the same command after a crash
+skips every trial already recorded as completed.
+
+Usage:
+    python -m backend.batch_runner scenarios.jsonl transcripts.jsonl --concurrency 4
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from backend.core import CourtroomSimulator
+from backend.metrics import start_metrics_server
+from backend.utils.helpers import percentile
+
+
+def scenario_id(record):
+    """Stable id for a scenario: its own "id", else a hash of the description."""
+    if record.get("id") is not None:
+        return str(record["id"])
+    return hashlib.sha256(record["crime_description"].encode("utf-8")).hexdigest()[:16]
+
+
+def load_scenarios(input_path):
+    """Read scenarios from JSONL, skipping blank lines."""
+    scenarios = []
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("crime_description"):
+                raise ValueError(f"{input_path}:{line_number} has no crime_description")
+            scenarios.append(record)
+    return scenarios
+
+
+def load_completed_ids(output_path):
+    """
+    Ids already recorded as completed in the output file.
+
+    A trailing partial line left by a crash is ignored; that trial reruns.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "completed":
+                completed.add(record["id"])
+    return completed
+
+
+class TranscriptWriter:
+    """
+    Appends one JSON record per line and syncs it to disk before returning.
+
+    Coroutines call write_async, which runs the write and fsync on a worker
+    thread so a checkpoint never blocks the event loop.
+    """
+
+    def __init__(self, output_path):
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        self._file = open(output_path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._ensure_line_boundary(output_path)
+
+    def _ensure_line_boundary(self, output_path):
+        # A crash can leave a partial last line; start new records on a fresh line
+        if os.path.getsize(output_path) > 0:
+            with open(output_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    async def write_async(self, record):
+        await asyncio.to_thread(self.write, record)
+
+    def close(self):
+        self._file.close()
+
+
+async def run_batch(scenarios, output_path, concurrency=4, simulator=None):
+    """
+    Run scenarios through run_trial_async, at most `concurrency` at a time.
+
+    Returns:
+        dict: Summary with counts, wall time, throughput and latency percentiles
+    """
+    simulator = simulator or CourtroomSimulator()
+    completed_ids = load_completed_ids(output_path)
+    pending = [record for record in scenarios if scenario_id(record) not in completed_ids]
+    print(f"[📋] {len(scenarios)} scenarios, {len(scenarios) - len(pending)} already completed, {len(pending)} to run")
+
+    writer = TranscriptWriter(output_path)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = []
+
+    async def run_one(record):
+        trial_id = scenario_id(record)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                trial = await simulator.run_trial_async(record["crime_description"])
+            except Exception as e:
+                failures.append(trial_id)
+                await writer.write_async({"id": trial_id, "status": "failed", "stage": getattr(e, "stage", None), "error": str(e)})
+                print(f"[❌] {trial_id} failed: {e}")
+                return
+            latency = time.perf_counter() - start
+
+        latencies.append(latency)
+        await writer.write_async({"id": trial_id, "status": "completed", "latency_s": round(latency, 3), "trial": trial})
+        print(f"[✓] {trial_id} completed in {latency:.1f}s ({len(latencies)}/{len(pending)})")
+
+    batch_start = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_one(record) for record in pending))
+    finally:
+        writer.close()
+    wall_time = time.perf_counter() - batch_start
+
+    return {
+        "skipped": len(scenarios) - len(pending),
+        "completed": len(latencies),
+        "failed": len(failures),
+        "wall_time_s": round(wall_time, 2),
+        "throughput_per_min": round(60 * len(latencies) / wall_time, 2) if wall_time > 0 else 0.0,
+        "latency_p50_s": round(percentile(latencies, 50), 2),
+        "latency_p95_s": round(percentile(latencies, 95), 2),
+        "latency_p99_s": round(percentile(latencies, 99), 2)
+    }
+
+
+def print_summary(summary):
+    print("\n[📊] Batch summary")
+    print(f"    completed: {summary['completed']}  failed: {summary['failed']}  skipped (already done): {summary['skipped']}")
+    print(f"    wall time: {summary['wall_time_s']}s  throughput: {summary['throughput_per_min']} trials/min")
+    print(f"    latency p50: {summary['latency_p50_s']}s  p95: {summary['latency_p95_s']}s  p99: {summary['latency_p99_s']}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run mock trials from a JSONL file of crime descriptions")
+    parser.add_argument("input", help="JSONL with one {\"id\", \"crime_description\"} object per line")
+    parser.add_argument("output", help="JSONL transcripts file; also the resume checkpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum trials in flight")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while the batch runs")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    summary = asyncio.run(run_batch(load_scenarios(args.input), args.output, args.concurrency))
+    print_summary(summary)
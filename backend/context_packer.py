@@ -0,0 +1,159 @@
+# backend/context_packer.py
+
+import logging
+import os
+import re
+import threading
+
+from backend.utils.config_loader import get_context_settings
+
+# Word n-gram size used to detect sections whose text is already in the context
+SHINGLE_SIZE = 8
+# Table-of-contents leaders ("Punishment for murder ........ 302"), bare page numbers
+NOISE_LINE_PATTERN = re.compile(r"^(?:.*\.{4,}\s*\d*|\s*\d+\s*|\s*page\s+\d+(?:\s+of\s+\d+)?\s*)$", re.IGNORECASE)
+
+logger = logging.getLogger("courtroom")
+
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+_fallback_logged = False
+
+
+class Tokenizer:
+    """
+    Counts and truncates prompt text in model tokens.
+
+    `name` is a tiktoken encoding (e.g. cl100k_base) or, if it contains a "/",
+    a Hugging Face tokenizer id. When neither library can load it, tokens are
+    approximated as 4-character chunks, as the rate limiter estimates them.
+
+    tiktoken downloads an encoding on first use and keeps it under
+    TIKTOKEN_CACHE_DIR, which defaults to cache_dir so later runs work offline.
+    """
+
+    def __init__(self, name, cache_dir=None):
+        self.name = name
+        self._encode, self._decode = self._load(name, cache_dir)
+
+    @staticmethod
+    def _load(name, cache_dir=None):
+        global _fallback_logged
+        try:
+            if "/" in name:
+                from transformers import AutoTokenizer
+
+                tokenizer = AutoTokenizer.from_pretrained(name)
+                return (lambda text: tokenizer.encode(text, add_special_tokens=False)), tokenizer.decode
+
+            if cache_dir:
+                os.environ.setdefault("TIKTOKEN_CACHE_DIR", os.path.abspath(cache_dir))
+            import tiktoken
+
+            encoding = tiktoken.get_encoding(name)
+            return encoding.encode, encoding.decode
+        except Exception as e:
+            if not _fallback_logged:
+                _fallback_logged = True
+                logger.warning("Tokenizer '%s' unavailable (%s); approximating 4 characters per token", name, e)
+            return (lambda text: [text[i:i + 4] for i in range(0, len(text), 4)]), "".join
+
+    def count(self, text):
+        return len(self._encode(text))
+
+    def truncate(self, text, max_tokens):
+        """Cut text to at most max_tokens tokens, marking the cut with '...'."""
+        tokens = self._encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self._decode(tokens[:max(max_tokens - 1, 0)]).rstrip() + "..."
+
+
+def get_tokenizer(name, cache_dir=None):
+    """Return the process-wide Tokenizer for name, loading it on first use."""
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(name)
+        if tokenizer is None:
+            tokenizer = _tokenizers[name] = Tokenizer(name, cache_dir)
+    return tokenizer
+
+
+def clean_section_text(text):
+    """Drop table-of-contents and page-number lines and collapse runs of blank space."""
+    lines = [line.strip() for line in text.splitlines()]
+    kept = [line for line in lines if line and not NOISE_LINE_PATTERN.match(line)]
+    return re.sub(r"[ \t]+", " ", "\n".join(kept))
+
+
+def _shingles(text):
+    words = text.lower().split()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))} if words else set()
+
+
+class ContextPacker:
+    """
+    Builds the parts of an agent prompt that are bounded by token budgets.
+
+    Budgets come from agent_settings.<agent> in config.yaml: context_tokens
+    for the retrieved sections, argument_tokens for each quoted argument.
+    The tokenizer is loaded on the first pack or truncate call, not when the
+    agent is constructed.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.settings = get_context_settings(agent)
+        self._tokenizer = None
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer(self.settings["tokenizer"], self.settings["cache_dir"])
+        return self._tokenizer
+
+    def truncate(self, text, max_tokens=None):
+        """Cut an argument (or other free text) to the agent's argument budget."""
+        return self.tokenizer.truncate(text, max_tokens or self.settings["argument_tokens"])
+
+    def pack(self, sections, budget=None):
+        """
+        Assemble retrieved sections into a prompt context within a token budget.
+
+        Sections are taken best score first (scores are distances, lower is
+        better). A section already in the context, by act and number or by
+        most of its text, is skipped. The section that overflows the budget is
+        truncated to fit, unless fewer than min_section_tokens remain.
+
+        Args:
+            sections (list): Retrieved section dicts (doc_type, section_id, title, content, score)
+            budget (int): Token budget (defaults to the agent's context_tokens)
+        Returns:
+            str: Context block, sections separated by blank lines
+        """
+        budget = budget or self.settings["context_tokens"]
+        separator_tokens = self.tokenizer.count("\n\n")
+        seen_ids = set()
+        seen_shingles = set()
+        blocks = []
+        remaining = budget
+
+        for section in sorted(sections, key=lambda sec: sec.get("score", 0.0)):
+            key = (section["doc_type"], str(section["section_id"]))
+            body = clean_section_text(section["content"])
+            shingles = _shingles(body)
+            if key in seen_ids or (shingles and len(shingles & seen_shingles) / len(shingles) >= self.settings["overlap_threshold"]):
+                continue
+
+            block = f"[{section['doc_type']} Section {section['section_id']}]: {section['title']}\n{body}"
+            cost = self.tokenizer.count(block) + (separator_tokens if blocks else 0)
+            if cost > remaining:
+                available = remaining - (separator_tokens if blocks else 0)
+                if available >= self.settings["min_section_tokens"]:
+                    blocks.append(self.tokenizer.truncate(block, available))
+                break
+
+            blocks.append(block)
+            remaining -= cost
+            seen_ids.add(key)
+            seen_shingles |= shingles
+
+        return "\n\n".join(blocks)
@@ -1,12 +1,194 @@
 # backend/core.py
 
+import asyncio
+import contextvars
+import inspect
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 from backend.agents.prosecution_agent import ProsecutionAgent
 from backend.agents.defense_agent import DefenseAgent
 from backend.agents.cross_examiner_agent import CrossExaminerAgent
 from backend.agents.judge_agent import JudgeAgent
+from backend import registry
+from backend.metrics import TRIALS, TRIAL_SECONDS, STAGE_SECONDS
+from backend.tracing import start_trace, stage_context
+from backend.trial_retrieval import trial_retrieval
+from backend.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class TrialError(Exception):
+    """
+    Raised when a trial stage fails, e.g. an LLMCallError after retries.
+
+    Attributes:
+        stage (str): Name of the stage that failed
+        error (Exception): The underlying exception (also chained as __cause__)
+    """
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """
+    A named step of the trial pipeline.
+
+    Args:
+        name (str): Name under which the stage's result is stored
+        func (callable): Called with the values of `inputs`, in order
+        inputs (list): Names of initial values or earlier stages this stage needs
+        streams (bool): Whether func accepts an `on_token` callback for streamed output
+    """
+
+    def __init__(self, name, func, inputs=(), streams=False):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.streams = streams
+
+
+class StageScheduler:
+    """
+    Small dependency-graph executor: every stage starts as soon as all of its
+    inputs are available, so independent stages run concurrently on a thread pool.
+    """
+
+    def __init__(self, stages, max_workers=4):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+        self.stages = list(stages)
+        self.max_workers = max_workers
+
+    def run(self, initial_values, on_event=None):
+        """
+        Execute all stages.
+
+        Args:
+            initial_values (dict): Values available before any stage runs
+            on_event (callable): Optional callback receiving stage_start, token and
+                stage_complete event dicts; called from worker threads
+        Returns:
+            tuple: (values dict including every stage result, timings dict per stage)
+        Raises:
+            TrialError: If a stage raises; stages still running are cancelled
+        """
+        values = dict(initial_values)
+        timings = {}
+        pending = list(self.stages)
+        running = {}
+        run_start = time.perf_counter()
+
+        def execute(stage, args):
+            kwargs = {}
+            if on_event:
+                on_event({"type": "stage_start", "stage": stage.name})
+                if stage.streams:
+                    kwargs["on_token"] = lambda text: on_event({"type": "token", "stage": stage.name, "text": text})
+
+            start = time.perf_counter()
+            with stage_context(stage.name):
+                result = stage.func(*args, **kwargs)
+            end = time.perf_counter()
+            STAGE_SECONDS.observe(end - start, stage=stage.name)
+            timings[stage.name] = {
+                "start": round(start - run_start, 4),
+                "duration": round(end - start, 4)
+            }
+
+            if on_event:
+                on_event({"type": "stage_complete", "stage": stage.name, "result": result, "duration": timings[stage.name]["duration"]})
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = [stage for stage in pending if all(name in values for name in stage.inputs)]
+                for stage in ready:
+                    pending.remove(stage)
+                    args = [values[name] for name in stage.inputs]
+                    # Each worker runs in a copy of the caller's context, so the current trace follows it
+                    running[executor.submit(contextvars.copy_context().run, execute, stage, args)] = stage
+
+                if not running:
+                    missing = {stage.name: [n for n in stage.inputs if n not in values] for stage in pending}
+                    raise ValueError(f"Unsatisfiable stage inputs: {missing}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        values[stage.name] = future.result()
+                    except Exception as e:
+                        for other in running:
+                            other.cancel()
+                        raise TrialError(stage.name, e) from e
+
+        return values, timings
+
+    async def run_async(self, initial_values):
+        """
+        Execute all stages on the running event loop.
+
+        Coroutine functions are awaited directly; plain functions run in a worker
+        thread. Returns the same (values, timings) pair as run().
+        """
+        values = dict(initial_values)
+        timings = {}
+        pending = list(self.stages)
+        running = {}
+        run_start = time.perf_counter()
+
+        async def execute(stage, args):
+            start = time.perf_counter()
+            with stage_context(stage.name):
+                if inspect.iscoroutinefunction(stage.func):
+                    result = await stage.func(*args)
+                else:
+                    result = await asyncio.to_thread(stage.func, *args)
+            end = time.perf_counter()
+            STAGE_SECONDS.observe(end - start, stage=stage.name)
+            timings[stage.name] = {
+                "start": round(start - run_start, 4),
+                "duration": round(end - start, 4)
+            }
+            return result
+
+        try:
+            while pending or running:
+                ready = [stage for stage in pending if all(name in values for name in stage.inputs)]
+                for stage in ready:
+                    pending.remove(stage)
+                    args = [values[name] for name in stage.inputs]
+                    running[asyncio.ensure_future(execute(stage, args))] = stage
+
+                if not running:
+                    missing = {stage.name: [n for n in stage.inputs if n not in values] for stage in pending}
+                    raise ValueError(f"Unsatisfiable stage inputs: {missing}")
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    try:
+                        values[stage.name] = task.result()
+                    except Exception as e:
+                        raise TrialError(stage.name, e) from e
+        finally:
+            for task in running:
+                task.cancel()
+
+        return values, timings
+
 
 class CourtroomSimulator:
-    def __init__(self):
+    def __init__(self, max_workers=4):
         """
         Initialize all courtroom agents.
         """
@@ -14,34 +196,161 @@ class CourtroomSimulator:
         self.defense = DefenseAgent()
         self.cross_examiner = CrossExaminerAgent()
         self.judge = JudgeAgent()
+        self.max_workers = max_workers
+        self.last_stage_timings = {}
+
+    def warm_up(self):
+        """
+        Load the embedding model and all legal corpora into the shared registry
+        so the first trial doesn't pay the load cost.
+        """
+        registry.warm_up()
+
+    def release(self):
+        """
+        Release the shared model and corpora held by the registry.
+        """
+        registry.release()
+
+    def _plan_retrieval(self, crime_description):
+        # Requests every agent will make regardless of the other agents' arguments
+        agents = (self.prosecutor, self.defense, self.cross_examiner, self.judge)
+        return [request for agent in agents for request in agent.planned_requests(crime_description)]
+
+    @staticmethod
+    def _prefetch(retrieval, plan):
+        # A failed prefetch is not fatal: each stage retries its own requests and fails as that stage
+        try:
+            retrieval.prefetch(plan)
+        except Exception as e:
+            print(f"[⚠️] Retrieval prefetch failed: {e}")
+
+    def _build_stages(self):
+        # Prosecution and defense only need the crime description, so they run in parallel
+        return [
+            Stage("prosecution", self.prosecutor.build_case, ["crime_description"], streams=True),
+            Stage("defense", self.defense.build_case, ["crime_description"], streams=True),
+            Stage("cross_examination", self.cross_examiner.examine, ["prosecution", "defense"], streams=True),
+            Stage("verdict", self.judge.render_verdict, ["prosecution", "defense", "cross_examination"], streams=True)
+        ]
 
-    def run_trial(self, crime_description):
+    def _build_async_stages(self):
+        return [
+            Stage("prosecution", self.prosecutor.build_case_async, ["crime_description"]),
+            Stage("defense", self.defense.build_case_async, ["crime_description"]),
+            Stage("cross_examination", self.cross_examiner.examine_async, ["prosecution", "defense"]),
+            Stage("verdict", self.judge.render_verdict_async, ["prosecution", "defense", "cross_examination"])
+        ]
+
+    def run_trial(self, crime_description, on_event=None):
         """
         Run the full mock courtroom simulation based on the given crime description.
         Returns a structured trial result.
+
+        Per-stage timings of the last trial are kept in `last_stage_timings`, and
+        trial_result["trace"] breaks each stage down into model load, encoding,
+        search, prompt build and LLM call time plus token usage. Agents share one
+        set of retrieval results per trial (backend/trial_retrieval.py);
+        trace["retrieval"] counts the requests made and the searches they took.
+
+        Args:
+            crime_description (str): The alleged crime
+            on_event (callable): Optional progress callback. It receives dicts with a
+                "type" of stage_start, token (agent replies are then streamed),
+                stage_complete, trial_failed or trial_complete. It is called from worker threads.
+        Raises:
+            TrialError: If a stage fails, e.g. the Groq API is unavailable after retries
         """
         print("🏛️ Starting mock courtroom simulation...\n")
 
-        # Step 1: Prosecution builds its case
-        prosecution_case = self.prosecutor.build_case(crime_description)
+        scheduler = StageScheduler(self._build_stages(), max_workers=self.max_workers)
+        start = time.perf_counter()
+        with start_trace() as trace, trial_retrieval() as retrieval:
+            self._prefetch(retrieval, self._plan_retrieval(crime_description))
+            try:
+                values, timings = scheduler.run({"crime_description": crime_description}, on_event=on_event)
+            except TrialError as e:
+                TRIALS.inc(status="failed")
+                print(f"[❌] Trial stopped: {e}")
+                if on_event:
+                    on_event({"type": "trial_failed", "stage": e.stage, "error": e})
+                raise
+        trial_result = self._compile_result(crime_description, values, timings, trace, retrieval, time.perf_counter() - start)
+
+        if on_event:
+            on_event({"type": "trial_complete", "result": trial_result})
+        return trial_result
+
+    def stream_trial(self, crime_description):
+        """
+        Run a trial in the background and yield its progress events in the
+        caller's thread, ending with the trial_complete event.
+
+        Useful for UIs that can only update from their own thread.
+        """
+        events = queue.Queue()
+        done = object()
+
+        def worker():
+            try:
+                self.run_trial(crime_description, on_event=events.put)
+            except Exception as e:
+                events.put({"type": "error", "error": e})
+            finally:
+                events.put(done)
 
-        # Step 2: Defense responds
-        defense_case = self.defense.build_case(crime_description)
+        threading.Thread(target=worker, daemon=True).start()
+        while True:
+            event = events.get()
+            if event is done:
+                return
+            if event["type"] == "error":
+                raise event["error"]
+            yield event
+
+    async def run_trial_async(self, crime_description):
+        """
+        Async version of run_trial. Many trials can share one event loop and the
+        pooled LLM client without holding a thread per in-flight request.
+
+        Raises:
+            TrialError: If a stage fails
+        """
+        print("🏛️ Starting mock courtroom simulation...\n")
 
-        # Step 3: Cross-Examiner analyzes both sides
-        cross_examination = self.cross_examiner.examine(prosecution_case, defense_case)
+        scheduler = StageScheduler(self._build_async_stages())
+        start = time.perf_counter()
+        with start_trace() as trace, trial_retrieval() as retrieval:
+            await asyncio.to_thread(self._prefetch, retrieval, self._plan_retrieval(crime_description))
+            try:
+                values, timings = await scheduler.run_async({"crime_description": crime_description})
+            except TrialError:
+                TRIALS.inc(status="failed")
+                raise
+        return self._compile_result(crime_description, values, timings, trace, retrieval, time.perf_counter() - start)
 
-        # Step 4: Judge evaluates and renders verdict
-        verdict = self.judge.render_verdict(prosecution_case, defense_case, cross_examination)
+    def _compile_result(self, crime_description, values, timings, trace, retrieval, duration):
+        self.last_stage_timings = timings
+        TRIALS.inc(status="completed")
+        TRIAL_SECONDS.observe(duration)
 
         # Compile full trial result
         trial_result = {
             "crime_description": crime_description,
-            "prosecution": prosecution_case,
-            "defense": defense_case,
-            "cross_examination": cross_examination,
-            "verdict": verdict
+            "prosecution": values["prosecution"],
+            "defense": values["defense"],
+            "cross_examination": values["cross_examination"],
+            "verdict": values["verdict"],
+            "trace": dict(trace.to_dict(), retrieval=retrieval.stats())
         }
 
+        for name, timing in timings.items():
+            print(f"[⏱️] {name}: {timing['duration']:.2f}s (started at +{timing['start']:.2f}s)")
+        logger.info("Trial trace: %s", json.dumps({
+            "duration": round(duration, 4),
+            "stages": trial_result["trace"]["stages"],
+            "prompt_tokens": trial_result["trace"]["prompt_tokens"],
+            "completion_tokens": trial_result["trace"]["completion_tokens"]
+        }))
         print("✅ Trial completed successfully.")
-        return trial_result
\ No newline at end of file
+        return trial_result
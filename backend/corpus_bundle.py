@@ -0,0 +1,288 @@
+# backend/corpus_bundle.py
+
+"""
+Versioned corpus bundles.
+
+A bundle is an immutable directory under data/bundles/<version>/ holding
+everything retrieval reads for each act (FAISS index and its metadata,
+re-ranking vectors, sections JSON, section store, lexical index) plus a
+manifest.json with the embedding model, counts and SHA-256 checksums.
+data/bundles/CURRENT names the version to serve; it is replaced atomically,
+so a reader sees either the old or the new version, never a mix.
+
+Bundles are published by `python -m backend.embedding_manager` and
+picked up by running processes through ResourceRegistry.switch_bundle()
+(or automatically with retrieval.bundles.poll_seconds).
+
+Usage:
+    python -m backend.corpus_bundle list
+    python -m backend.corpus_bundle publish
+    python -m backend.corpus_bundle activate 20240101-120000-1a2b3c4d
+    python -m backend.corpus_bundle verify
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+BUNDLES_DIR = os.path.join("data", "bundles")
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is missing, incomplete or doesn't match its manifest."""
+
+
+def file_checksum(path):
+    """SHA-256 hex digest of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def corpus_files(index_path, sections_path):
+    """
+    The files retrieval reads for one corpus, in copy order.
+
+    The sections JSON comes before the section store and lexical index so the
+    copies keep passing their "at least as new as the JSON" freshness checks.
+    """
+    from backend.lexical_index import get_lexical_index_path
+    from backend.registry import get_index_meta_path, get_vectors_path
+    from backend.section_store import get_section_store_paths
+
+    candidates = [sections_path, *get_section_store_paths(sections_path), get_lexical_index_path(sections_path),
+                  index_path, get_index_meta_path(index_path), get_vectors_path(index_path)]
+    return [path for path in candidates if os.path.exists(path)]
+
+
+class CorpusBundle:
+    """
+    A published bundle, opened from its directory.
+
+    Args:
+        path (str): Bundle directory (data/bundles/<version>)
+    Raises:
+        BundleError: If the directory has no readable manifest
+    """
+
+    def __init__(self, path):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"No valid manifest in {path}: {e}") from e
+        self.version = self.manifest["version"]
+        self.model_name = self.manifest["model_name"]
+        self.corpora = self.manifest["corpora"]
+
+    def _entry(self, document_type):
+        entry = self.corpora.get(document_type)
+        if entry is None:
+            raise BundleError(f"Bundle {self.version} has no '{document_type}' corpus")
+        return entry
+
+    def index_path(self, document_type):
+        return os.path.join(self.path, self._entry(document_type)["index_file"])
+
+    def sections_path(self, document_type):
+        return os.path.join(self.path, self._entry(document_type)["sections_file"])
+
+    def verify(self, document_type=None):
+        """
+        Check files against the manifest checksums (one corpus, or all of them).
+
+        Raises:
+            BundleError: On a missing or modified file
+        """
+        for name in [document_type] if document_type else list(self.corpora):
+            for file_name, expected in self._entry(name)["files"].items():
+                path = os.path.join(self.path, file_name)
+                if not os.path.exists(path):
+                    raise BundleError(f"Bundle {self.version} is missing {file_name}")
+                if file_checksum(path) != expected["sha256"]:
+                    raise BundleError(f"Bundle {self.version}: {file_name} does not match its manifest checksum")
+
+    def check_corpus(self, document_type, index, sections):
+        """
+        Reject a loaded corpus whose index and sections disagree with each other or the manifest.
+
+        Raises:
+            BundleError: If the vector count, section count and manifest counts differ
+        """
+        entry = self._entry(document_type)
+        if not (index.ntotal == len(sections) == entry["ntotal"] == entry["sections"]):
+            raise BundleError(
+                f"Bundle {self.version} '{document_type}': index holds {index.ntotal} vectors and "
+                f"{len(sections)} sections were loaded, manifest expects {entry['ntotal']}"
+            )
+
+
+def get_current_version(bundles_dir=BUNDLES_DIR):
+    """Version named by the CURRENT pointer, or None if no bundle was activated."""
+    try:
+        with open(os.path.join(bundles_dir, CURRENT_NAME), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def open_bundle(version, bundles_dir=BUNDLES_DIR):
+    """Open a bundle by version."""
+    return CorpusBundle(os.path.join(bundles_dir, version))
+
+
+def open_current_bundle(bundles_dir=BUNDLES_DIR):
+    """Open the bundle named by CURRENT, or return None to serve the loose files."""
+    version = get_current_version(bundles_dir)
+    return open_bundle(version, bundles_dir) if version else None
+
+
+def list_bundles(bundles_dir=BUNDLES_DIR):
+    """Versions of the published bundles, oldest first."""
+    if not os.path.isdir(bundles_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(bundles_dir)
+        if not name.startswith(".") and os.path.exists(os.path.join(bundles_dir, name, MANIFEST_NAME))
+    )
+
+
+def activate_bundle(version, bundles_dir=BUNDLES_DIR):
+    """
+    Point CURRENT at a published version.
+
+    The pointer is written to a temporary file and moved into place, so
+    processes polling it never read a partial name.
+
+    Raises:
+        BundleError: If the version is not a complete bundle
+    """
+    open_bundle(version, bundles_dir)
+    pointer = os.path.join(bundles_dir, CURRENT_NAME)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer + ".tmp", pointer)
+    print(f"[📌] Active corpus bundle: {version}")
+
+
+def publish_bundle(document_types=None, bundles_dir=BUNDLES_DIR, activate=True):
+    """
+    Snapshot the built indexes and sections into a new immutable bundle.
+
+    Files are copied into a hidden staging directory that is renamed into
+    place once the manifest is written, so a bundle directory is always
+    complete. Nothing is published if the result would be identical to the
+    current bundle.
+
+    Args:
+        document_types (list): Corpora to include (default: every act, plus combined if built)
+        bundles_dir (str): Directory holding the bundles and the CURRENT pointer
+        activate (bool): Point CURRENT at the new bundle
+    Returns:
+        str: Version of the new (or unchanged current) bundle
+    Raises:
+        BundleError: If a corpus has no index or its files disagree
+    """
+    from backend.registry import COMBINED, DOCUMENT_TYPES, get_index_path, get_sections_path, load_index_meta
+
+    if document_types is None:
+        document_types = list(DOCUMENT_TYPES) + ([COMBINED] if os.path.exists(get_index_path(COMBINED)) else [])
+
+    corpora = {}
+    sources = {}
+    for document_type in document_types:
+        index_path, sections_path = get_index_path(document_type), get_sections_path(document_type)
+        if not (os.path.exists(index_path) and os.path.exists(sections_path)):
+            raise BundleError(f"No built index for '{document_type}'; run: python -m backend.embedding_manager")
+        meta = load_index_meta(index_path)
+        with open(sections_path, "r", encoding="utf-8") as f:
+            section_count = len(json.load(f))
+        if meta.get("ntotal", section_count) != section_count:
+            raise BundleError(f"{index_path} holds {meta['ntotal']} vectors but {sections_path} has {section_count} sections")
+
+        files = corpus_files(index_path, sections_path)
+        sources[document_type] = files
+        corpora[document_type] = {
+            "index_file": os.path.basename(index_path),
+            "sections_file": os.path.basename(sections_path),
+            "index_type": meta.get("index_type", "flat"),
+            "model_name": meta.get("model_name"),
+            "dimension": meta.get("dimension"),
+            "ntotal": meta.get("ntotal", section_count),
+            "sections": section_count,
+            "files": {
+                os.path.basename(path): {"sha256": file_checksum(path), "bytes": os.path.getsize(path)}
+                for path in files
+            }
+        }
+
+    model_names = {entry["model_name"] for entry in corpora.values()}
+    if len(model_names) != 1:
+        raise BundleError(f"Corpora were built with different embedding models: {sorted(map(str, model_names))}")
+
+    digest = hashlib.sha256(json.dumps(corpora, sort_keys=True).encode("utf-8")).hexdigest()
+    current = get_current_version(bundles_dir)
+    if current and open_bundle(current, bundles_dir).manifest.get("digest") == digest:
+        print(f"[⏭️] Corpus bundle {current} is up to date")
+        return current
+
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{digest[:8]}"
+    staging = os.path.join(bundles_dir, f".{version}.tmp")
+    # Leftovers of an interrupted publish are never visible as a bundle
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for files in sources.values():
+        for path in files:
+            shutil.copyfile(path, os.path.join(staging, os.path.basename(path)))
+
+    manifest = {
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "model_name": model_names.pop(),
+        "digest": digest,
+        "corpora": corpora
+    }
+    with open(os.path.join(staging, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    os.rename(staging, os.path.join(bundles_dir, version))
+    print(f"[📦] Corpus bundle {version} published to {bundles_dir}")
+
+    if activate:
+        activate_bundle(version, bundles_dir)
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish, list, activate and verify corpus bundles")
+    parser.add_argument("command", choices=["list", "publish", "activate", "verify"])
+    parser.add_argument("version", nargs="?", help="activate/verify: bundle version (verify defaults to CURRENT)")
+    parser.add_argument("--dir", default=BUNDLES_DIR, help="Bundles directory")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = get_current_version(args.dir)
+        for version in list_bundles(args.dir):
+            print(f"{'*' if version == current else ' '} {version}")
+    elif args.command == "publish":
+        publish_bundle(bundles_dir=args.dir)
+    elif args.command == "activate":
+        if not args.version:
+            parser.error("activate needs a version")
+        activate_bundle(args.version, args.dir)
+    else:
+        version = args.version or get_current_version(args.dir)
+        if not version:
+            parser.error("no version given and no bundle is active")
+        open_bundle(version, args.dir).verify()
+        print(f"[✓] Corpus bundle {version} matches its manifest")
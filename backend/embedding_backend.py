@@ -0,0 +1,207 @@
+# backend/embedding_backend.py
+
+"""
+Embedding backends selected by embedding_model / embedding in config.yaml.
+
+A model id names both the model and how it runs:
+    "bert-base-nli-mean-tokens"             sentence-transformers (PyTorch)
+    "all-MiniLM-L6-v2@onnx_int8"            int8-quantized ONNX Runtime on CPU
+
+Indexes, section-embedding and query caches are keyed by the model id, so
+vectors from different backends are never mixed.
+
+Export a model for the ONNX backend once (needs optimum and torch):
+    python -m backend.embedding_backend export all-MiniLM-L6-v2
+"""
+
+import json
+import os
+
+import numpy as np
+
+BACKENDS = ("sentence_transformers", "onnx_int8")
+ONNX_MODEL_DIR = os.path.join("data", "models")
+
+
+def make_model_id(model_name, backend="sentence_transformers"):
+    """Model id for a model name run on a backend (plain name for sentence-transformers)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+    return model_name if backend == "sentence_transformers" else f"{model_name}@{backend}"
+
+
+def parse_model_id(model_id):
+    """Split a model id into (model name, backend)."""
+    model_name, _, backend = model_id.partition("@")
+    return model_name, backend or "sentence_transformers"
+
+
+def _hub_id(model_name):
+    # Short sentence-transformers names live under the sentence-transformers organisation
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def get_onnx_model_path(model_name, model_dir=ONNX_MODEL_DIR):
+    """Directory holding the exported ONNX model and tokenizer for model_name."""
+    return os.path.join(model_dir, model_name.replace("/", "__"))
+
+
+class SentenceTransformerBackend:
+    """sentence-transformers model on PyTorch."""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_id = model_name
+        self._model = SentenceTransformer(model_name)
+        self.dimension = self._model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, show_progress_bar=False):
+        return np.asarray(self._model.encode(list(texts), show_progress_bar=show_progress_bar), dtype="float32")
+
+
+class OnnxInt8Backend:
+    """
+    int8-quantized transformer on ONNX Runtime with the model's own pooling.
+
+    Needs only onnxruntime and a tokenizer at query time; PyTorch is never imported.
+    """
+
+    def __init__(self, model_name, model_dir=ONNX_MODEL_DIR, max_length=256, batch_size=32, threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx_int8 embedding backend needs onnxruntime; run: pip install onnxruntime") from e
+        from transformers import AutoTokenizer
+
+        path = get_onnx_model_path(model_name, model_dir)
+        model_path = os.path.join(path, "model_int8.onnx")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No int8 ONNX export of {model_name} at {path}; run: python -m backend.embedding_backend export {model_name}"
+            )
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {node.name for node in self._session.get_inputs()}
+        self._tokenizer = AutoTokenizer.from_pretrained(path)
+
+        with open(os.path.join(path, "pooling.json"), "r", encoding="utf-8") as f:
+            pooling = json.load(f)
+        self.pooling = pooling.get("pooling", "mean")
+        self.normalize = pooling.get("normalize", False)
+        self.dimension = pooling["dimension"]
+        self.model_id = make_model_id(model_name, "onnx_int8")
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+    def encode(self, texts, show_progress_bar=False):
+        texts = list(texts)
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self._tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            inputs = {name: value.astype("int64") for name, value in batch.items() if name in self._input_names}
+            token_embeddings = self._session.run(None, inputs)[0]
+
+            if self.pooling == "cls":
+                pooled = token_embeddings[:, 0]
+            else:
+                # Mean over real (non-padding) tokens, as sentence-transformers does
+                mask = batch["attention_mask"][..., None].astype("float32")
+                pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype("float32"))
+
+        if not batches:
+            return np.zeros((0, self.dimension), dtype="float32")
+        return np.vstack(batches)
+
+
+def load_embedding_backend(model_id, settings=None):
+    """
+    Load the backend a model id names.
+
+    Args:
+        model_id (str): Model name, optionally suffixed with @<backend>
+        settings (dict): embedding settings from config (onnx_dir, max_length, batch_size, threads)
+    """
+    settings = settings or {}
+    model_name, backend = parse_model_id(model_id)
+    if backend == "sentence_transformers":
+        return SentenceTransformerBackend(model_name)
+    if backend == "onnx_int8":
+        return OnnxInt8Backend(
+            model_name,
+            model_dir=settings.get("onnx_dir", ONNX_MODEL_DIR),
+            max_length=settings.get("max_length", 256),
+            batch_size=settings.get("batch_size", 32),
+            threads=settings.get("threads")
+        )
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+
+def export_onnx_int8(model_name, model_dir=ONNX_MODEL_DIR):
+    """
+    Export a sentence-transformers model to ONNX and quantize its weights to int8.
+
+    Writes model.onnx, model_int8.onnx, the tokenizer and pooling.json under
+    get_onnx_model_path(model_name).
+    """
+    from huggingface_hub import hf_hub_download
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+    except ImportError as e:
+        raise ImportError("Exporting to int8 ONNX needs optimum and onnxruntime; run: pip install \"optimum[onnxruntime]\"") from e
+    from transformers import AutoTokenizer
+
+    hub_id = _hub_id(model_name)
+    path = get_onnx_model_path(model_name, model_dir)
+    os.makedirs(path, exist_ok=True)
+
+    print(f"[📦] Exporting {hub_id} to ONNX")
+    model = ORTModelForFeatureExtraction.from_pretrained(hub_id, export=True)
+    model.save_pretrained(path)
+    AutoTokenizer.from_pretrained(hub_id).save_pretrained(path)
+
+    print("[🗜️] Quantizing weights to int8")
+    quantize_dynamic(os.path.join(path, "model.onnx"), os.path.join(path, "model_int8.onnx"), weight_type=QuantType.QInt8)
+
+    # Mirror the sentence-transformers pipeline: same pooling mode, normalize only if the model does
+    with open(hf_hub_download(hub_id, "modules.json"), "r", encoding="utf-8") as f:
+        modules = json.load(f)
+    pooling_module = next(module for module in modules if module["type"].endswith("Pooling"))
+    with open(hf_hub_download(hub_id, f"{pooling_module['path']}/config.json"), "r", encoding="utf-8") as f:
+        pooling_config = json.load(f)
+    pooling = {
+        "pooling": "cls" if pooling_config.get("pooling_mode_cls_token") else "mean",
+        "normalize": any(module["type"].endswith("Normalize") for module in modules),
+        "dimension": int(model.config.hidden_size)
+    }
+    with open(os.path.join(path, "pooling.json"), "w", encoding="utf-8") as f:
+        json.dump(pooling, f, indent=4)
+
+    print(f"[✓] Saved int8 model to {path}")
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Embedding backend utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export a model to int8 ONNX for the onnx_int8 backend")
+    export_parser.add_argument("model_name")
+    export_parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+
+    export_onnx_int8(args.model_name, args.model_dir)
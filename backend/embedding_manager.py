@@ -1,20 +1,199 @@
 # backend/embedding_manager.py
 
+import hashlib
 import json
 import os
+import sqlite3
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import faiss
 
+from backend.corpus_bundle import publish_bundle
+from backend.registry import registry, apply_search_params, get_index_meta_path, get_vectors_path, load_index_meta
+from backend.lexical_index import lexical_index_is_current, write_lexical_index
+from backend.section_store import section_store_is_current, write_section_store
+from backend.utils.config_loader import get_vector_index_settings
 
-def build_vectorstore(json_path, model_name="bert-base-nli-mean-tokens", save_path=None):
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq_fp16", "sq_int8")
+# Index types that store lossy codes, so exact re-ranking can improve their order
+LOSSY_INDEX_TYPES = ("ivf_pq", "sq_fp16", "sq_int8")
+SCALAR_QUANTIZERS = {"sq_fp16": "QT_fp16", "sq_int8": "QT_8bit"}
+EMBEDDING_CACHE_PATH = os.path.join("data", "cache", "section_embeddings.sqlite")
+
+
+def content_hash(model_name, text):
+    """Hash identifying the embedding of `text` under `model_name`."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class SectionEmbeddingCache:
+    """
+    On-disk store of section embeddings keyed by content_hash, so rebuilds only
+    embed sections whose text (or model) changed.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB)")
+
+    def get_many(self, hashes):
+        """Return {hash: vector} for the hashes present in the cache."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._db.execute(f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", chunk)
+            for key, vector in rows:
+                found[key] = np.frombuffer(vector, dtype="float32")
+        return found
+
+    def put_many(self, hashes, vectors):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+            [(key, np.asarray(vector, dtype="float32").tobytes()) for key, vector in zip(hashes, vectors)]
+        )
+        self._db.commit()
+
+
+def embed_sections(texts, model_name, cache=None):
+    """
+    Embed section texts, reusing cached vectors and encoding only new or changed ones.
+
+    The model is borrowed from the shared registry and only loaded when
+    something actually needs embedding.
+
+    Returns:
+        tuple: (float32 embeddings array, number of sections that were embedded)
+    """
+    hashes = [content_hash(model_name, text) for text in texts]
+    found = cache.get_many(hashes) if cache else {}
+
+    missing = {}
+    for key, text in zip(hashes, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+
+    print(f"[♻️] {len(found)} of {len(found) + len(missing)} unique sections cached, embedding {len(missing)} new or changed")
+    if missing:
+        model = registry.get_model(model_name)
+        vectors = model.encode(list(missing.values()), show_progress_bar=True)
+        found.update(zip(missing, np.asarray(vectors, dtype="float32")))
+        if cache:
+            cache.put_many(list(missing), vectors)
+
+    return np.vstack([found[key] for key in hashes]).astype("float32"), len(missing)
+
+
+def build_fingerprint(model_name, texts, index_settings):
+    """Fingerprint of everything that determines an index's contents."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(index_settings, sort_keys=True).encode("utf-8"))
+    for text in texts:
+        digest.update(content_hash(model_name, text).encode("ascii"))
+    return digest.hexdigest()
+
+
+def create_index(embeddings, settings):
+    """
+    Create and fill a FAISS index of the configured type.
+
+    IVF, PQ and int8 scalar quantizers are trained on a seeded random sample
+    of at most `train_sample_size` vectors; cluster counts and PQ code sizes
+    are clamped so small corpora still train. Scalar-quantized indexes
+    (sq_fp16, sq_int8) are exhaustive like flat, at 1/2 or 1/4 of its size.
+
+    Args:
+        embeddings (np.ndarray): float32 vectors, one per row
+        settings (dict): vector_index settings from config.yaml
+    Returns:
+        tuple: (faiss.Index, dict of query-time search parameters to persist)
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    count, dimension = embeddings.shape
+    index_type = settings["type"]
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dimension)
+        index.add(embeddings)
+        return index, {}
+
+    sample_size = min(settings["train_sample_size"], count)
+    rng = np.random.default_rng(settings["seed"])
+    sample = embeddings[np.sort(rng.choice(count, sample_size, replace=False))]
+
+    if index_type in SCALAR_QUANTIZERS:
+        qtype = getattr(faiss.ScalarQuantizer, SCALAR_QUANTIZERS[index_type])
+        index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_L2)
+        index.train(sample)  # int8 learns per-dimension ranges; fp16 needs no training
+        index.add(embeddings)
+        return index, {}
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, settings["hnsw_m"])
+        index.hnsw.efConstruction = settings["ef_construction"]
+        index.add(embeddings)
+        search_params = {"efSearch": settings["ef_search"]}
+        apply_search_params(index, search_params)
+        return index, search_params
+
+    # IVF variants: faiss wants roughly 39 training points per cell
+    nlist = settings["nlist"] or int(4 * np.sqrt(count))
+    nlist = max(1, min(nlist, count // 39 or 1))
+    quantizer = faiss.IndexFlatL2(dimension)
+
+    if index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+    else:
+        if dimension % settings["pq_m"] != 0:
+            raise ValueError(f"pq_m={settings['pq_m']} must divide the embedding dimension {dimension}")
+        nbits = max(1, min(settings["pq_nbits"], int(np.log2(count))))
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, settings["pq_m"], nbits)
+
+    index.train(sample)
+    index.add(embeddings)
+
+    search_params = {"nprobe": min(settings["nprobe"], nlist)}
+    apply_search_params(index, search_params)
+    return index, search_params
+
+
+def save_index(index, save_path, meta, vectors=None):
+    """
+    Write a FAISS index and its sidecar metadata (index type, search parameters),
+    plus the full-precision vectors used for re-ranking when given.
+    """
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    faiss.write_index(index, save_path)
+    vectors_path = get_vectors_path(save_path)
+    if vectors is not None:
+        np.save(vectors_path, np.ascontiguousarray(vectors, dtype="float32"))
+    elif os.path.exists(vectors_path):
+        os.remove(vectors_path)
+    with open(get_index_meta_path(save_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4)
+
+
+def build_vectorstore(json_path, model_name=None, save_path=None, index_settings=None, cache=None, force=False):
     """
     Build a FAISS vector store from a JSON file of legal sections.
+
+    Builds are incremental: section embeddings come from a content-hashed
+    cache, and a saved index whose fingerprint (model, section contents, index
+    settings) is unchanged is kept as-is instead of being rewritten.
     
     Args:
         json_path (str): Path to input JSON file
-        model_name (str): Name of the Sentence Transformer model
+        model_name (str): Embedding model id (defaults to the one configured in config.yaml)
         save_path (str): Path to save FAISS index
+        index_settings (dict): Index type and parameters (defaults to vector_index in config.yaml)
+        cache (SectionEmbeddingCache): Embedding cache (defaults to the one under data/cache)
+        force (bool): Rebuild and rewrite the index even if nothing changed
     Returns:
         faiss.Index: Built FAISS index or None if skipped
     """
@@ -27,38 +206,112 @@ def build_vectorstore(json_path, model_name="bert-base-nli-mean-tokens", save_pa
         return None
 
     texts = [sec["content"] for sec in sections]
+    model_name = model_name or registry.model_name
 
     if len(texts) == 0:
         print(f"[⚠️] No sections found in {json_path}. Skipping...")
         return None
 
-    # Load embedding model
-    print(f"[🧠] Loading embedding model: {model_name}")
-    model = SentenceTransformer(model_name)
+    index_settings = index_settings or get_vector_index_settings()
+    fingerprint = build_fingerprint(model_name, texts, index_settings)
+
+    if save_path and not section_store_is_current(json_path):
+        # Offset-indexed copy of the sections for memory-mapped loading
+        records_path, _ = write_section_store(sections, json_path)
+        print(f"[💾] Section store saved to: {records_path}")
+
+    if save_path and not lexical_index_is_current(json_path):
+        # BM25 postings and section-number lookup for hybrid retrieval
+        lexical_path = write_lexical_index(sections, json_path)
+        print(f"[💾] Lexical index saved to: {lexical_path}")
+
+    if save_path and not force and os.path.exists(save_path) and load_index_meta(save_path).get("fingerprint") == fingerprint:
+        print(f"[⏭️] {os.path.basename(save_path)} is up to date, keeping existing index")
+        return faiss.read_index(save_path)
 
     # Generate embeddings
     print(f"[🧬] Generating embeddings for {len(texts)} sections...")
     try:
-        embeddings = model.encode(texts, show_progress_bar=True)
+        embeddings, _ = embed_sections(texts, model_name, cache or SectionEmbeddingCache())
     except Exception as e:
         print(f"[⚠️] Failed to generate embeddings: {e}")
         return None
 
     # Build FAISS index
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
+    print(f"[🗂️] Building {index_settings['type']} index")
+    index, search_params = create_index(embeddings, index_settings)
+
+    # Re-ranking only helps indexes that store lossy codes
+    rerank_factor = index_settings["rerank_factor"] if index_settings["type"] in LOSSY_INDEX_TYPES else 0
 
     # Save index if path provided
     if save_path:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        faiss.write_index(index, save_path)
+        save_index(index, save_path, {
+            "index_type": index_settings["type"],
+            "search_params": search_params,
+            "rerank_factor": rerank_factor,
+            "dimension": int(embeddings.shape[1]),
+            "ntotal": int(index.ntotal),
+            "model_name": model_name,
+            "fingerprint": fingerprint
+        }, vectors=embeddings if rerank_factor else None)
         print(f"[💾] Vector store saved to: {save_path}")
 
     return index
 
 
+def build_combined_vectorstore(json_paths, model_name=None, save_path=None, sections_path=None, cache=None, force=False):
+    """
+    Build one FAISS vector store spanning several legal documents.
+
+    Sections are concatenated in the given order and tagged with their
+    doc_type, so vector ids map straight into the combined section table.
+
+    Args:
+        json_paths (dict): document_type -> path of its sections JSON
+        model_name (str): Embedding model id (defaults to the one configured in config.yaml)
+        save_path (str): Path to save FAISS index
+        sections_path (str): Path to save the combined sections JSON
+        cache (SectionEmbeddingCache): Embedding cache shared with the per-act builds
+        force (bool): Rebuild and rewrite the index even if nothing changed
+    Returns:
+        faiss.Index: Built FAISS index or None if skipped
+    """
+    combined = []
+    for document_type, json_path in json_paths.items():
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                sections = json.load(f)
+        except Exception as e:
+            print(f"[⚠️] Failed to load {json_path}: {e}")
+            return None
+
+        for section in sections:
+            combined.append(dict(section, doc_type=document_type))
+
+    # Leave an identical file untouched so its section store stays current
+    serialized = json.dumps(combined, indent=4)
+    current = None
+    if os.path.exists(sections_path):
+        with open(sections_path, "r", encoding="utf-8") as f:
+            current = f.read()
+    if current != serialized:
+        with open(sections_path, "w", encoding="utf-8") as f:
+            f.write(serialized)
+    print(f"[📚] Combined {len(combined)} sections into {sections_path}")
+
+    return build_vectorstore(sections_path, model_name=model_name, save_path=save_path, cache=cache, force=force)
+
+
 if __name__ == "__main__":
+    import sys
+
+    # --force rewrites every index even if its fingerprint is unchanged
+    FORCE = "--force" in sys.argv
+    # --no-bundle leaves the loose files only, without publishing a corpus bundle
+    BUNDLE = "--no-bundle" not in sys.argv
+    cache = SectionEmbeddingCache()
+
     DATA_DIR = "data"
     PROCESSED_DIR = os.path.join(DATA_DIR, "processed")
     VECTORSTORE_DIR = os.path.join(DATA_DIR, "vectorstore")
@@ -71,18 +324,37 @@ if __name__ == "__main__":
         "evidence_act_sections.json": "evidence_act_vectorstore.faiss"
     }
 
-    MODEL_NAME = "bert-base-nli-mean-tokens"
+    MODEL_NAME = registry.model_name
+    print(f"[🧠] Embedding model: {MODEL_NAME}")
 
     for json_file, faiss_file in docs.items():
         json_path = os.path.join(PROCESSED_DIR, json_file)
         faiss_path = os.path.join(VECTORSTORE_DIR, faiss_file)
 
         print(f"\n[📁] Processing: {json_file}")
-        result = build_vectorstore(json_path, model_name=MODEL_NAME, save_path=faiss_path)
+        result = build_vectorstore(json_path, model_name=MODEL_NAME, save_path=faiss_path, cache=cache, force=FORCE)
 
         if result is None:
             print(f"[⚠️] Skipped {json_file}")
         else:
             print(f"[✓] Completed {json_file}")
 
+    # Optional single index over all acts, used when retrieval.unified_index is enabled
+    if "--combined" in sys.argv:
+        print("\n[📁] Processing: combined index")
+        result = build_combined_vectorstore(
+            {json_file.replace("_sections.json", ""): os.path.join(PROCESSED_DIR, json_file) for json_file in docs},
+            model_name=MODEL_NAME,
+            save_path=os.path.join(VECTORSTORE_DIR, "combined_vectorstore.faiss"),
+            sections_path=os.path.join(PROCESSED_DIR, "combined_sections.json"),
+            cache=cache,
+            force=FORCE
+        )
+        print("[⚠️] Skipped combined index" if result is None else "[✓] Completed combined index")
+
+    # Immutable snapshot of the built files; running apps switch to it via CURRENT
+    if BUNDLE:
+        print("\n[📁] Publishing corpus bundle")
+        publish_bundle()
+
     print("\n[✅] All done!")
\ No newline at end of file
@@ -4,50 +4,126 @@ import re
 import json
 import pdfplumber
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 
-def extract_sections(pdf_path, section_pattern=r"(?i)(?=\bsection\s+\d+)", output_file=None):
+PAGES_PER_TASK = 8      # Pages extracted by one worker task
+MAX_PENDING_TASKS = 16  # In-flight tasks per document, bounds memory held by finished-but-unread pages
+
+
+def _extract_page_range(pdf_path, start, end):
+    # Runs in a worker process: each task opens its own handle on the PDF
+    with pdfplumber.open(pdf_path) as pdf:
+        return [page.extract_text() for page in pdf.pages[start:end]]
+
+
+def iter_page_texts(pdf_path, executor=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Yield the text of each page in order.
+
+    With an executor, page ranges are extracted in parallel while at most
+    MAX_PENDING_TASKS ranges are in flight, so memory stays bounded.
+
+    Args:
+        pdf_path (str): Path to input PDF
+        executor (Executor): Optional process pool to fan extraction out on
+        pages_per_task (int): Pages per worker task
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        if executor is None:
+            for page in pdf.pages:
+                yield page.extract_text()
+            return
+
+    ranges = deque((start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task))
+    pending = deque()
+    while ranges or pending:
+        while ranges and len(pending) < MAX_PENDING_TASKS:
+            start, end = ranges.popleft()
+            pending.append(executor.submit(_extract_page_range, pdf_path, start, end))
+        yield from pending.popleft().result()
+
+
+def iter_raw_sections(page_texts, section_pattern=r"(?i)(?=\bsection\s+\d+)"):
+    """
+    Split a stream of page texts into raw section strings.
+
+    Produces exactly what re.split(section_pattern, full_text) would, but only
+    keeps the text since the last section boundary in memory. That trailing
+    section is held back until the next boundary appears, so sections spanning
+    page breaks come out whole.
+    """
+    splitter = re.compile(section_pattern)
+    buffer = ""
+
+    for text in page_texts:
+        if not text:
+            continue
+        buffer += text + "\n"
+
+        starts = [match.start() for match in splitter.finditer(buffer) if match.start() > 0]
+        previous = 0
+        for start in starts:
+            yield buffer[previous:start]
+            previous = start
+        buffer = buffer[previous:]
+
+    yield buffer
+
+
+def parse_section(sec):
+    """Turn one raw section string into a section dict, or None if it has no section number."""
+    sec_id_match = re.search(r"section\s+(\d+)", sec[:150], re.IGNORECASE)
+    if not sec_id_match:
+        return None
+
+    sec_id = sec_id_match.group(1)
+    title_end_match = re.search(r"[:\.]\s*\n?", sec)
+    title_end_idx = title_end_match.end() if title_end_match else sec.find("\n")
+    title = sec[:title_end_idx].strip()
+    content = sec.strip()
+
+    return {
+        "section_id": sec_id,
+        "title": title,
+        "content": content
+    }
+
+
+def extract_sections(pdf_path, section_pattern=r"(?i)(?=\bsection\s+\d+)", output_file=None, executor=None, workers=None):
     """
     Generic function to extract sections from any legal PDF.
     Args:
         pdf_path (str): Path to input PDF
         section_pattern (str): Regex pattern to split sections
         output_file (str): Optional path to save JSON output
+        executor (Executor): Optional shared process pool for page extraction
+        workers (int): Worker processes to start when no executor is given (1 extracts in-process)
     Returns:
         list: List of extracted sections
     """
-    full_text = ""
+    own_executor = None
+    if executor is None and (workers or os.cpu_count() or 1) > 1:
+        own_executor = executor = ProcessPoolExecutor(max_workers=workers)
+
+    sections = []
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
+        raw_sections = iter_raw_sections(iter_page_texts(pdf_path, executor), section_pattern)
+        for position, sec in enumerate(raw_sections):
+            # Leading text before the first boundary is dropped when blank, as re.split would leave it
+            if position == 0 and not sec.strip():
+                continue
+            section = parse_section(sec)
+            if section:
+                sections.append(section)
     except Exception as e:
         print(f"[❌] Error reading PDF: {e}")
         return []
-
-    raw_sections = re.split(section_pattern, full_text)
-    if not raw_sections[0].strip():
-        raw_sections.pop(0)
-
-    sections = []
-    for sec in raw_sections:
-        sec_id_match = re.search(r"section\s+(\d+)", sec[:150], re.IGNORECASE)
-        if not sec_id_match:
-            continue
-
-        sec_id = sec_id_match.group(1)
-        title_end_match = re.search(r"[:\.]\s*\n?", sec)
-        title_end_idx = title_end_match.end() if title_end_match else sec.find("\n")
-        title = sec[:title_end_idx].strip()
-        content = sec.strip()
-
-        sections.append({
-            "section_id": sec_id,
-            "title": title,
-            "content": content
-        })
+    finally:
+        if own_executor:
+            own_executor.shutdown()
 
     # Save to JSON if output file is provided
     if output_file:
@@ -59,8 +135,6 @@ def extract_sections(pdf_path, section_pattern=r"(?i)(?=\bsection\s+\d+)", outpu
 
 
 if __name__ == "__main__":
-    import os
-
     DATA_DIR = "data"
     PROCESSED_DIR = os.path.join(DATA_DIR, "processed")
     os.makedirs(PROCESSED_DIR, exist_ok=True)
@@ -72,7 +146,13 @@ if __name__ == "__main__":
         "evidence_act_raw.pdf": os.path.join(PROCESSED_DIR, "evidence_act_sections.json")
     }
 
-    for pdf_file, json_file in docs.items():
-        pdf_path = os.path.join(DATA_DIR, pdf_file)
-        print(f"\n[+] Processing {pdf_file}...")
-        extract_sections(pdf_path, output_file=json_file)
\ No newline at end of file
+    # One process pool shared by all documents, so pages of every PDF are extracted in parallel
+    with ProcessPoolExecutor() as pool, ThreadPoolExecutor(max_workers=len(docs)) as document_threads:
+        futures = {}
+        for pdf_file, json_file in docs.items():
+            pdf_path = os.path.join(DATA_DIR, pdf_file)
+            print(f"\n[+] Processing {pdf_file}...")
+            futures[pdf_file] = document_threads.submit(extract_sections, pdf_path, output_file=json_file, executor=pool)
+
+        for pdf_file, future in futures.items():
+            future.result()
@@ -0,0 +1,194 @@
+# backend/lexical_index.py
+
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be been by for from has have if in into is it its of on or such "
+    "that the their then there these this to was were which who will with shall any".split()
+)
+
+# Words that may surround a citation without turning it into a free-text question
+CITATION_FILLER = frozenset(
+    "what is are does do say says said under of the read text show me explain define "
+    "definition meaning provision provisions act code please".split()
+)
+
+# "Section 302", "sections 34 and 149", "s. 154", "sec 41A", "u/s 302", "§ 25"
+CITATION_PATTERN = re.compile(
+    r"(?:\b(?:sections?|secs?\.?|ss?\.|u/s\.?)|§)\s*(\d+[a-z]?(?:\s*(?:,|&|and)\s*\d+[a-z]?)*)(?![a-z0-9])",
+    re.IGNORECASE
+)
+# "302 IPC", "154 of the CrPC"
+BARE_CITATION_PATTERN = re.compile(
+    r"\b(\d+[a-z]?)\s+(?:of\s+(?:the\s+)?)?(?=ipc|i\.p\.c|crpc|cr\.?\s?p\.?\s?c|evidence act|iea)",
+    re.IGNORECASE
+)
+ACT_PATTERNS = {
+    "ipc": re.compile(r"\b(?:indian penal code|penal code|ipc|i\.p\.c\.?)(?![a-z])", re.IGNORECASE),
+    "crpc": re.compile(r"\b(?:code of criminal procedure|criminal procedure code|crpc|cr\.?\s?p\.?\s?c\.?)(?![a-z])", re.IGNORECASE),
+    "evidence_act": re.compile(r"\b(?:indian evidence act|evidence act|iea)(?![a-z])", re.IGNORECASE)
+}
+
+
+def tokenize(text):
+    """Lower-cased word and number tokens with common stopwords removed."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def parse_citation(text):
+    """
+    Find explicit section citations in a query.
+
+    Args:
+        text (str): Query text, e.g. "Section 302" or "s. 154 CrPC"
+    Returns:
+        dict: section_ids (lower-cased, in citation order), act (a document
+        type or None) and exact (True when the query asks for nothing but the
+        cited sections), or None if the query cites no section
+    """
+    section_ids = []
+    remainder = text
+    for pattern in (CITATION_PATTERN, BARE_CITATION_PATTERN):
+        for match in pattern.finditer(text):
+            section_ids.extend(re.findall(r"\d+[a-z]?", match.group(1).lower()))
+        remainder = pattern.sub(" ", remainder)
+    if not section_ids:
+        return None
+
+    acts = [act for act, pattern in ACT_PATTERNS.items() if pattern.search(text)]
+    for pattern in ACT_PATTERNS.values():
+        remainder = pattern.sub(" ", remainder)
+
+    rest = [token for token in TOKEN_PATTERN.findall(remainder.lower()) if token not in CITATION_FILLER]
+    return {
+        "section_ids": list(dict.fromkeys(section_ids)),
+        "act": acts[0] if len(acts) == 1 else None,
+        "exact": not rest
+    }
+
+
+def get_lexical_index_path(json_path):
+    """Return the lexical index path derived from a sections JSON."""
+    return os.path.splitext(json_path)[0] + ".lexical.json"
+
+
+def lexical_index_is_current(json_path):
+    """True if a lexical index exists and is at least as new as its JSON source."""
+    path = get_lexical_index_path(json_path)
+    if not os.path.exists(path):
+        return False
+    return not os.path.exists(json_path) or os.path.getmtime(path) >= os.path.getmtime(json_path)
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over section contents plus a section_id -> positions map.
+
+    Positions are the sections' row numbers, the same ids the FAISS index uses.
+    """
+
+    def __init__(self, postings, doc_lengths, section_ids, k1=1.5, b=0.75):
+        self.postings = postings
+        self.doc_lengths = np.asarray(doc_lengths, dtype="float32")
+        self.section_ids = section_ids
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+
+    @classmethod
+    def from_sections(cls, sections, k1=1.5, b=0.75):
+        """Build the index from section dicts (or a SectionStore)."""
+        postings = {}
+        doc_lengths = []
+        section_ids = {}
+        for position in range(len(sections)):
+            section = sections[position]
+            tokens = tokenize(section["content"])
+            doc_lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(position)
+                postings[term][1].append(count)
+            section_ids.setdefault(str(section["section_id"]).lower(), []).append(position)
+
+        arrays = {
+            term: (np.array(ids, dtype="int32"), np.array(counts, dtype="float32"))
+            for term, (ids, counts) in postings.items()
+        }
+        return cls(arrays, doc_lengths, section_ids, k1, b)
+
+    @classmethod
+    def load(cls, json_path):
+        """Load the lexical index written for a sections JSON."""
+        with open(get_lexical_index_path(json_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        postings = {
+            term: (np.array(ids, dtype="int32"), np.array(counts, dtype="float32"))
+            for term, (ids, counts) in data["postings"].items()
+        }
+        return cls(postings, data["doc_lengths"], data["section_ids"], data["k1"], data["b"])
+
+    def save(self, json_path):
+        """Write the index next to its sections JSON, moved into place when complete."""
+        path = get_lexical_index_path(json_path)
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_lengths": self.doc_lengths.astype(int).tolist(),
+            "section_ids": self.section_ids,
+            "postings": {term: [ids.tolist(), counts.astype(int).tolist()] for term, (ids, counts) in self.postings.items()}
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+        return path
+
+    def lookup(self, section_id):
+        """Positions of the sections numbered section_id (several if extraction split one)."""
+        return self.section_ids.get(str(section_id).lower(), [])
+
+    def search(self, query_text, top_k, mask=None, with_scores=False):
+        """
+        Rank sections by BM25 score for a query.
+
+        Args:
+            query_text (str): Free-text query
+            top_k (int): Maximum number of positions to return
+            mask (np.ndarray): Optional boolean array of sections allowed in the results
+            with_scores (bool): Return (score, position) pairs instead of positions
+        Returns:
+            list: Positions of the best-scoring sections, best first
+        """
+        count = len(self.doc_lengths)
+        scores = np.zeros(count, dtype="float32")
+        for term in set(tokenize(query_text)):
+            if term not in self.postings:
+                continue
+            ids, counts = self.postings[term]
+            idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[ids] / max(self.avg_length, 1e-9))
+            scores[ids] += idf * counts * (self.k1 + 1) / (counts + norm)
+
+        if mask is not None:
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        # Stable order on equal scores: earlier sections first
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))]
+        if with_scores:
+            return [(float(scores[idx]), int(idx)) for idx in ranked]
+        return [int(idx) for idx in ranked]
+
+
+def write_lexical_index(sections, json_path):
+    """Build and save the lexical index for a sections JSON; returns its path."""
+    return LexicalIndex.from_sections(sections).save(json_path)
@@ -0,0 +1,142 @@
+# backend/llm_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from backend.utils.config_loader import get_llm_cache_settings
+
+
+CACHE_MODES = ("off", "read_write", "record", "replay")
+
+
+class LLMCacheMissError(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def request_key(messages, model, temperature, max_tokens):
+    """Content address of a chat completion request."""
+    payload = json.dumps({
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed cache of chat completion replies.
+
+    Modes:
+        off         - bypass the cache entirely
+        read_write  - serve fresh hits, call the API and store on a miss
+        record      - always call the API and (re)store the reply
+        replay      - serve recorded replies regardless of age; a miss raises
+                      LLMCacheMissError, so runs are offline and deterministic
+
+    Entries older than ttl_seconds are ignored outside replay mode, and the
+    least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, path, mode="read_write", ttl_seconds=None, max_entries=None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {CACHE_MODES}")
+
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+        if mode != "off":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT, created_at REAL, last_used REAL)"
+            )
+            self._db.commit()
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def get(self, key):
+        """
+        Return the cached reply for key, or None.
+
+        Raises:
+            LLMCacheMissError: In replay mode, when nothing was recorded for key
+        """
+        if self.mode in ("off", "record"):
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            expired = row is not None and self.mode != "replay" and self.ttl_seconds and now - row[1] > self.ttl_seconds
+            if row is None or expired:
+                self.misses += 1
+                if self.mode == "replay":
+                    raise LLMCacheMissError(f"No recorded LLM response for request {key[:12]}")
+                return None
+
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key, response):
+        """Store a reply and evict least recently used entries beyond max_entries."""
+        if self.mode in ("off", "replay"):
+            return
+
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, response, now, now))
+            if self.max_entries:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the number of stored replies."""
+        entries = 0
+        if self._db is not None:
+            with self._lock:
+                entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Return the process-wide response cache configured by llm_cache in config.yaml.
+
+    The LEGA_LLM_CACHE_MODE environment variable overrides the configured mode,
+    e.g. LEGA_LLM_CACHE_MODE=replay for offline test runs.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_llm_cache_settings()
+            _cache = LLMResponseCache(
+                settings["path"],
+                mode=os.getenv("LEGA_LLM_CACHE_MODE", settings["mode"]),
+                ttl_seconds=settings["ttl_seconds"],
+                max_entries=settings["max_entries"]
+            )
+    return _cache
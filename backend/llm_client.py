@@ -0,0 +1,335 @@
+# backend/llm_client.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from dotenv import load_dotenv
+
+from backend.llm_cache import get_llm_cache, request_key
+from backend.metrics import LLM_REQUESTS
+from backend.rate_limiter import get_rate_limiter
+from backend.tracing import span, record_usage
+from backend.utils.config_loader import get_rate_limit_settings, get_groq_base_url
+
+
+# Default endpoint; set groq.base_url in config.yaml or LEGA_LLM_BASE_URL to use another
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+# Keep-alive pool shared by every agent in the process (httpx.Limits / httpx.Timeout arguments)
+POOL_LIMITS = {"max_connections": 64, "max_keepalive_connections": 16, "keepalive_expiry": 60.0}
+TIMEOUT = {"timeout": 60.0, "connect": 10.0}
+
+# Request timeout, conflict, rate limit; 5xx responses are always retried
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+_lock = threading.Lock()
+_dotenv_loaded = False
+_base_url = None
+_clients = {}
+_retry_config = None
+# Async HTTP pools are bound to the event loop they were created on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _credentials():
+    global _dotenv_loaded, _base_url
+    if not _dotenv_loaded:
+        load_dotenv()
+        _base_url = get_groq_base_url(GROQ_BASE_URL)
+        _dotenv_loaded = True
+    return os.getenv("GROQ_API_KEY"), _base_url
+
+
+def get_client():
+    """
+    Return the shared synchronous client for the current API key.
+
+    The SDK's own retries are disabled; the completion helpers below retry
+    through the shared rate limiter instead. openai and httpx are imported on
+    first use so importing the agents stays cheap.
+    """
+    import httpx
+    from openai import OpenAI
+
+    api_key, base_url = _credentials()
+    with _lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                http_client=httpx.Client(limits=httpx.Limits(**POOL_LIMITS), timeout=httpx.Timeout(**TIMEOUT))
+            )
+            _clients[(api_key, base_url)] = client
+    return client
+
+
+def get_async_client():
+    """
+    Return the shared AsyncOpenAI client for the running event loop and API key.
+    """
+    import httpx
+    from openai import AsyncOpenAI
+
+    api_key, base_url = _credentials()
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get((api_key, base_url))
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=httpx.Limits(**POOL_LIMITS), timeout=httpx.Timeout(**TIMEOUT))
+            )
+            clients[(api_key, base_url)] = client
+    return client
+
+
+class LLMCallError(Exception):
+    """
+    Raised when a chat completion fails for good: a non-retryable error, or
+    retries exhausted. `status_code` is the HTTP status if the server answered.
+    """
+
+    def __init__(self, message, status_code=None, attempts=1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.attempts = attempts
+
+
+def _retry_settings():
+    global _retry_config
+    with _lock:
+        if _retry_config is None:
+            _retry_config = get_rate_limit_settings()
+    return _retry_config
+
+
+def estimate_tokens(messages, max_tokens):
+    """Rough token cost of a request for the rate limiter: ~4 characters per prompt token plus the completion budget."""
+    return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+
+def _status_code(error):
+    return getattr(error, "status_code", None)
+
+
+def _retry_after(error):
+    # Seconds requested by the server's Retry-After header, if any
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(error, attempt, settings):
+    """
+    Seconds to wait before retrying after error on the given attempt (0-based),
+    or None if the error is not retryable or retries are exhausted.
+    """
+    from openai import APIConnectionError
+
+    status = _status_code(error)
+    retryable = isinstance(error, APIConnectionError) or status in RETRYABLE_STATUS_CODES or (status or 0) >= 500
+    if not retryable or attempt >= settings["max_retries"]:
+        return None
+
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return retry_after + random.uniform(0, settings["backoff_base_seconds"])
+    # Full jitter keeps concurrent trials from retrying in lockstep
+    return random.uniform(0, min(settings["backoff_max_seconds"], settings["backoff_base_seconds"] * 2 ** attempt))
+
+
+def _give_up(error, attempt):
+    return LLMCallError(
+        f"Groq API request failed after {attempt + 1} attempt(s): {error}",
+        status_code=_status_code(error),
+        attempts=attempt + 1
+    )
+
+
+@contextmanager
+def _llm_span(model):
+    # Times one logical request (cache lookup, retries and all) and counts its outcome
+    with span("llm_call", model=model) as llm_span:
+        try:
+            yield llm_span
+        except Exception:
+            LLM_REQUESTS.inc(outcome="error")
+            raise
+        LLM_REQUESTS.inc(outcome="cached" if llm_span.get("cached") else "ok")
+
+
+def _settle_usage(llm_span, limiter, estimated, usage):
+    limiter.settle(estimated, usage.total_tokens if usage else None)
+    record_usage(llm_span, usage)
+
+
+def chat_completion(messages, model, temperature, max_tokens):
+    """
+    Run a chat completion on the shared client and return the stripped reply text.
+
+    Replies go through the response cache (see backend/llm_cache.py). Calls wait
+    on the shared rate limiter and are retried with backoff on 429s, timeouts
+    and server errors. Time and token usage are recorded as an llm_call span.
+
+    Raises:
+        LLMCallError: If the request fails for good
+    """
+    cache = get_llm_cache()
+    key = request_key(messages, model, temperature, max_tokens)
+    with _llm_span(model) as llm_span:
+        cached = cache.get(key)
+        if cached is not None:
+            llm_span["cached"] = True
+            return cached
+
+        limiter = get_rate_limiter()
+        settings = _retry_settings()
+        estimated = estimate_tokens(messages, max_tokens)
+        for attempt in range(settings["max_retries"] + 1):
+            limiter.acquire(estimated)
+            try:
+                chat_completion = get_client().chat.completions.create(
+                    messages=messages,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                break
+            except Exception as e:
+                delay = _backoff_delay(e, attempt, settings)
+                if delay is None:
+                    raise _give_up(e, attempt) from e
+                print(f"[⏳] Groq API call failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        llm_span["attempts"] = attempt + 1
+        _settle_usage(llm_span, limiter, estimated, getattr(chat_completion, "usage", None))
+        response = chat_completion.choices[0].message.content.strip()
+        cache.put(key, response)
+        return response
+
+
+async def chat_completion_async(messages, model, temperature, max_tokens):
+    """
+    Async counterpart of chat_completion using the pooled AsyncOpenAI client.
+    """
+    cache = get_llm_cache()
+    key = request_key(messages, model, temperature, max_tokens)
+    with _llm_span(model) as llm_span:
+        cached = cache.get(key)
+        if cached is not None:
+            llm_span["cached"] = True
+            return cached
+
+        limiter = get_rate_limiter()
+        settings = _retry_settings()
+        estimated = estimate_tokens(messages, max_tokens)
+        for attempt in range(settings["max_retries"] + 1):
+            await limiter.acquire_async(estimated)
+            try:
+                chat_completion = await get_async_client().chat.completions.create(
+                    messages=messages,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                break
+            except Exception as e:
+                delay = _backoff_delay(e, attempt, settings)
+                if delay is None:
+                    raise _give_up(e, attempt) from e
+                print(f"[⏳] Groq API call failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        llm_span["attempts"] = attempt + 1
+        _settle_usage(llm_span, limiter, estimated, getattr(chat_completion, "usage", None))
+        response = chat_completion.choices[0].message.content.strip()
+        cache.put(key, response)
+        return response
+
+
+def stream_chat_completion(messages, model, temperature, max_tokens):
+    """
+    Stream a chat completion on the shared client, yielding text deltas as they arrive.
+
+    A cached reply is yielded as a single delta; a fresh reply is stored once
+    the stream completes. A failed request is retried only if nothing has been
+    yielded yet, since delivered text cannot be taken back. Token usage is
+    requested in the final chunk.
+
+    Raises:
+        LLMCallError: If the request fails for good
+    """
+    cache = get_llm_cache()
+    key = request_key(messages, model, temperature, max_tokens)
+    with _llm_span(model) as llm_span:
+        cached = cache.get(key)
+        if cached is not None:
+            llm_span["cached"] = True
+            yield cached
+            return
+
+        limiter = get_rate_limiter()
+        settings = _retry_settings()
+        estimated = estimate_tokens(messages, max_tokens)
+        parts = []
+        usage = None
+        for attempt in range(settings["max_retries"] + 1):
+            limiter.acquire(estimated)
+            try:
+                stream = get_client().chat.completions.create(
+                    messages=messages,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+                break
+            except Exception as e:
+                delay = None if parts else _backoff_delay(e, attempt, settings)
+                if delay is None:
+                    raise _give_up(e, attempt) from e
+                print(f"[⏳] Groq API call failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        llm_span["attempts"] = attempt + 1
+        _settle_usage(llm_span, limiter, estimated, usage)
+        cache.put(key, "".join(parts).strip())
+
+
+def collect_stream(deltas, on_token):
+    """
+    Forward each streamed delta to on_token and return the full stripped reply.
+    """
+    parts = []
+    for delta in deltas:
+        on_token(delta)
+        parts.append(delta)
+    return "".join(parts).strip()
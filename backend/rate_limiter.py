@@ -0,0 +1,111 @@
+# backend/rate_limiter.py
+
+import asyncio
+import threading
+import time
+
+from backend.utils.config_loader import get_rate_limit_settings
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` units per second, holding at most `capacity`.
+
+    Callers reserve units up front and then wait out the returned delay, so
+    concurrent callers queue fairly in reservation order instead of polling.
+    """
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self._available = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """
+        Take `amount` units, going into debt if needed.
+
+        Returns:
+            float: Seconds the caller must wait before using the units
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available -= amount
+            return max(0.0, -self._available / self.rate)
+
+    def refund(self, amount):
+        """Return units (negative to charge more) once the real cost is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available = min(self.capacity, self._available + amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits shared by every LLM call in the process.
+
+    A limit of 0 or None disables that dimension.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+
+    def _reserve(self, tokens):
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens):
+        """Block until one request using about `tokens` tokens fits within both limits."""
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens):
+        """Async counterpart of acquire; waits without blocking the event loop."""
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once the provider reports the real usage of a request."""
+        if self.tokens and actual_tokens is not None:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Return the process-wide limiter configured by rate_limit in config.yaml.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            settings = get_rate_limit_settings()
+            if settings["enabled"]:
+                _limiter = RateLimiter(settings["requests_per_minute"], settings["tokens_per_minute"])
+            else:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def configure_rate_limiter(requests_per_minute=None, tokens_per_minute=None):
+    """
+    Replace the process-wide limiter, e.g. to lift limits when benchmarking against a local server.
+    """
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    return _limiter
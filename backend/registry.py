@@ -0,0 +1,421 @@
+# backend/registry.py
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.corpus_bundle import get_current_version, open_bundle, open_current_bundle
+from backend.embedding_backend import load_embedding_backend, make_model_id
+from backend.lexical_index import LexicalIndex, lexical_index_is_current
+from backend.section_store import SectionStore, section_store_is_current
+from backend.tracing import span
+from backend.utils.config_loader import RETRIEVAL_DEFAULTS, get_retrieval_settings, get_embedding_settings
+
+
+# Used when config.yaml names no embedding_model
+DEFAULT_MODEL_NAME = "bert-base-nli-mean-tokens"
+DOCUMENT_TYPES = ("ipc", "crpc", "evidence_act")
+# Single index over all acts, with every section tagged by doc_type
+COMBINED = "combined"
+
+VECTORSTORE_DIR = os.path.join("data", "vectorstore")
+PROCESSED_DIR = os.path.join("data", "processed")
+
+
+def get_index_path(document_type):
+    """Return the FAISS index path for a document type."""
+    return os.path.join(VECTORSTORE_DIR, f"{document_type}_vectorstore.faiss")
+
+
+def get_sections_path(document_type):
+    """Return the sections JSON path for a document type."""
+    return os.path.join(PROCESSED_DIR, f"{document_type}_sections.json")
+
+
+def get_index_meta_path(index_path):
+    """Return the sidecar JSON path holding an index's build and search parameters."""
+    return os.path.splitext(index_path)[0] + ".meta.json"
+
+
+def get_vectors_path(index_path):
+    """Return the .npy path holding an index's full-precision vectors for re-ranking."""
+    return os.path.splitext(index_path)[0] + ".vectors.npy"
+
+
+def load_index_meta(index_path):
+    """Load an index's sidecar metadata, or {} for indexes built without one."""
+    meta_path = get_index_meta_path(index_path)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def apply_search_params(index, search_params):
+    """
+    Apply persisted query-time parameters (e.g. nprobe, efSearch) to a loaded index.
+    """
+    if not search_params:
+        return
+    import faiss
+
+    parameter_space = faiss.ParameterSpace()
+    for name, value in search_params.items():
+        parameter_space.set_index_parameter(index, name, value)
+
+
+def read_index_mmap(index_path):
+    """
+    Read a FAISS index with its vectors memory-mapped instead of copied into RAM,
+    falling back to a regular read for index types that can't be mapped.
+    """
+    import faiss
+
+    for flag_name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+        flag = getattr(faiss, flag_name, None)
+        if flag is None:
+            continue
+        try:
+            return faiss.read_index(index_path, flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            continue
+    return faiss.read_index(index_path)
+
+
+class IndexModelMismatchError(ValueError):
+    """Raised when an index was built with a different embedding model than the configured one."""
+
+
+def check_index_model(index_path, index, meta, model_id, dimension=None):
+    """
+    Reject an index whose vectors don't come from model_id.
+
+    Indexes record the model id they were built with in their metadata; for
+    older indexes without one, only the vector dimension can be checked.
+    """
+    built_with = meta.get("model_name")
+    if built_with and built_with != model_id:
+        raise IndexModelMismatchError(
+            f"{index_path} was built with embedding model '{built_with}' but '{model_id}' is configured; "
+            f"rebuild it with: python -m backend.embedding_manager"
+        )
+    if dimension is not None and index.d != dimension:
+        raise IndexModelMismatchError(
+            f"{index_path} holds {index.d}-d vectors but '{model_id}' produces {dimension}-d embeddings; "
+            f"rebuild it with: python -m backend.embedding_manager"
+        )
+
+
+class Corpus:
+    """
+    A loaded FAISS index together with the section table it was built from.
+
+    For the combined corpus, `doc_types` holds each vector's act so search
+    results can be filtered without touching the sections. For compressed
+    indexes built with re-ranking, `vectors` memory-maps the float32 vectors
+    and `rerank_factor` is how many candidates per result to re-score.
+    `lexical` is the BM25 / section-number index over the same sections.
+    `version` is the corpus bundle the files came from (None for loose files).
+    """
+
+    def __init__(self, document_type, index, sections, meta=None, vectors=None, lexical=None,
+                 index_path=None, sections_path=None, version=None):
+        self.document_type = document_type
+        self.index = index
+        self.sections = sections
+        self.lexical = lexical
+        self.index_path = index_path or get_index_path(document_type)
+        self.sections_path = sections_path or get_sections_path(document_type)
+        self.version = version
+        self.meta = meta or {}
+        self.vectors = vectors
+        self.rerank_factor = self.meta.get("rerank_factor", 0) if vectors is not None else 0
+        self.doc_types = None
+        if document_type == COMBINED:
+            self.doc_types = np.array([section["doc_type"] for section in sections])
+
+
+class ResourceRegistry:
+    """
+    Process-wide, thread-safe cache of embedding models and legal corpora.
+
+    Retrievers borrow models and corpora from the registry instead of loading
+    their own copies, so each embedding model is loaded once per model name and
+    each FAISS index / sections JSON is read once per document type.
+
+    Corpora come from the active corpus bundle (backend/corpus_bundle.py) when
+    one is published, otherwise from the loose files under data/. The bundle
+    and the corpora loaded from it are swapped as one (bundle, corpora) pair.
+    """
+
+    def __init__(self, settings=None, model_name=None):
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._key_locks = {}
+        self._models = {}
+        self._active = None
+        # Explicit settings (e.g. in tests) are completed with the config defaults
+        self._settings = dict(RETRIEVAL_DEFAULTS, **settings) if settings is not None else None
+        self._model_name = model_name
+        self._embedding_settings = None
+
+    @property
+    def settings(self):
+        """Retrieval settings from config.yaml, read once."""
+        if self._settings is None:
+            self._settings = get_retrieval_settings()
+        return self._settings
+
+    @property
+    def embedding_settings(self):
+        """Embedding model and backend settings from config.yaml, read once."""
+        if self._embedding_settings is None:
+            self._embedding_settings = get_embedding_settings()
+        return self._embedding_settings
+
+    @property
+    def model_name(self):
+        """Id of the embedding model retrieval uses (see backend/embedding_backend.py)."""
+        if self._model_name is None:
+            settings = self.embedding_settings
+            self._model_name = make_model_id(settings["model_name"] or DEFAULT_MODEL_NAME, settings["backend"])
+        return self._model_name
+
+    def corpus_names(self):
+        """Names of the corpora that serve retrieval under the current settings."""
+        if self.settings["unified_index"]:
+            return [COMBINED]
+        return list(DOCUMENT_TYPES)
+
+    def _key_lock(self, key):
+        # One lock per resource so slow loads don't block unrelated lookups
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_model(self, model_name=None):
+        """
+        Return the shared embedding backend for model_name (default: the configured
+        model), loading it on first use.
+        """
+        model_name = model_name or self.model_name
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        with self._key_lock(("model", model_name)):
+            model = self._models.get(model_name)
+            if model is None:
+                print(f"[🧠] Loading embedding model: {model_name}")
+                with span("model_load", model=model_name):
+                    model = load_embedding_backend(model_name, self.embedding_settings)
+                self._models[model_name] = model
+        return model
+
+    def _snapshot(self):
+        # The (bundle, corpora) pair in use; resolved from CURRENT on first access
+        active = self._active
+        if active is None:
+            with self._lock:
+                if self._active is None:
+                    self._active = (open_current_bundle(self.settings["bundles"]["dir"]), {})
+                    self._start_watcher()
+                active = self._active
+        return active
+
+    @property
+    def bundle_version(self):
+        """Version of the corpus bundle being served, or None for loose files."""
+        bundle, _ = self._snapshot()
+        return bundle.version if bundle else None
+
+    def get_corpus(self, document_type):
+        """
+        Return the shared Corpus for document_type, loading it on first use.
+
+        Args:
+            document_type (str): One of ['ipc', 'crpc', 'evidence_act', 'combined']
+        Returns:
+            Corpus: Loaded index and sections
+        """
+        bundle, corpora = self._snapshot()
+        corpus = corpora.get(document_type)
+        if corpus is not None:
+            return corpus
+
+        with self._key_lock(("corpus", bundle.version if bundle else None, document_type)):
+            corpus = corpora.get(document_type)
+            if corpus is None:
+                with span("index_load", document_type=document_type):
+                    corpus = self._load_corpus(document_type, bundle)
+                corpora[document_type] = corpus
+        return corpus
+
+    def _load_corpus(self, document_type, bundle=None):
+        if document_type not in DOCUMENT_TYPES and document_type != COMBINED:
+            raise ValueError(f"Unknown document type: {document_type}")
+
+        if bundle is not None:
+            index_path = bundle.index_path(document_type)
+            sections_path = bundle.sections_path(document_type)
+            if self.settings["bundles"]["verify_checksums"]:
+                bundle.verify(document_type)
+        else:
+            index_path = get_index_path(document_type)
+            sections_path = get_sections_path(document_type)
+
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"Vector store not found at {index_path}")
+
+        if not os.path.exists(sections_path):
+            raise FileNotFoundError(f"Sections JSON not found at {sections_path}")
+
+        # faiss is imported with the first corpus, not with the app
+        import faiss
+
+        mmap = self.settings["mmap"]
+        index = read_index_mmap(index_path) if mmap else faiss.read_index(index_path)
+        meta = load_index_meta(index_path)
+        dimension = None if meta.get("model_name") else self.get_model().dimension
+        check_index_model(index_path, index, meta, self.model_name, dimension)
+        apply_search_params(index, meta.get("search_params"))
+
+        if mmap and section_store_is_current(sections_path):
+            sections = SectionStore(sections_path)
+        else:
+            with open(sections_path, "r", encoding="utf-8") as f:
+                sections = json.load(f)
+
+        # Only the rows of re-ranked candidates are ever paged in
+        vectors = None
+        if meta.get("rerank_factor"):
+            vectors_path = get_vectors_path(index_path)
+            if not os.path.exists(vectors_path):
+                raise FileNotFoundError(f"Re-ranking vectors not found at {vectors_path}")
+            vectors = np.load(vectors_path, mmap_mode="r")
+
+        # Indexes built before lexical indexes existed get one built in memory
+        if lexical_index_is_current(sections_path):
+            lexical = LexicalIndex.load(sections_path)
+        else:
+            lexical = LexicalIndex.from_sections(sections)
+
+        if bundle is not None:
+            bundle.check_corpus(document_type, index, sections)
+
+        return Corpus(document_type, index, sections, meta, vectors, lexical,
+                      index_path, sections_path, bundle.version if bundle else None)
+
+    def switch_bundle(self, version=None):
+        """
+        Serve another corpus bundle (by default, the one CURRENT names) without a restart.
+
+        The corpora in use are loaded from the new bundle first, then swapped in
+        together with it. Requests already running keep the corpora they started
+        with; bundles are never modified, so their files stay valid. If loading
+        fails, the registry keeps serving the current bundle.
+
+        Returns:
+            bool: True if the registry switched bundles
+        Raises:
+            BundleError: If the bundle is incomplete or fails verification
+        """
+        bundles_dir = self.settings["bundles"]["dir"]
+        with self._swap_lock:
+            version = version or get_current_version(bundles_dir)
+            current, corpora = self._snapshot()
+            if version is None or (current is not None and current.version == version):
+                return False
+
+            bundle = open_bundle(version, bundles_dir)
+            loaded = {}
+            for document_type in list(corpora):
+                with span("index_load", document_type=document_type, bundle=version):
+                    loaded[document_type] = self._load_corpus(document_type, bundle)
+            with self._lock:
+                self._active = (bundle, loaded)
+
+        print(f"[🔄] Serving corpus bundle {version}")
+        return True
+
+    def _start_watcher(self):
+        poll_seconds = self.settings["bundles"]["poll_seconds"]
+        if poll_seconds:
+            threading.Thread(target=self._watch, args=(poll_seconds,), name="lega-bundle-watcher", daemon=True).start()
+
+    def _watch(self, poll_seconds):
+        while True:
+            time.sleep(poll_seconds)
+            try:
+                self.switch_bundle()
+            except Exception as e:
+                print(f"[⚠️] Corpus bundle switch failed, still serving the previous one: {e}")
+
+    def warm_up(self, document_types=None, model_name=None):
+        """
+        Eagerly load the embedding model and the given corpora
+        (by default, the ones retrieval is configured to use).
+        """
+        self.get_model(model_name)
+        for document_type in document_types or self.corpus_names():
+            self.get_corpus(document_type)
+
+    def release(self, document_type=None, model_name=None):
+        """
+        Drop cached resources so they can be garbage collected.
+
+        With no arguments everything is released. Retrievers that already hold a
+        reference keep working; the next lookup loads a fresh copy.
+        """
+        release_all = document_type is None and model_name is None
+        with self._lock:
+            if self._active is not None and (release_all or document_type is not None):
+                corpora = self._active[1]
+                for key in list(corpora):
+                    if release_all or key == document_type:
+                        del corpora[key]
+            if release_all or model_name is not None:
+                for key in list(self._models):
+                    if release_all or key == model_name:
+                        del self._models[key]
+
+    def status(self):
+        """Return the names of the currently loaded models and corpora."""
+        return {
+            "models": sorted(self._models),
+            "corpora": sorted(self._active[1]) if self._active else []
+        }
+
+
+# Shared by every LegalRetriever unless one is passed explicitly
+registry = ResourceRegistry()
+
+
+def warm_up(document_types=None, model_name=None):
+    """Warm up the process-wide registry."""
+    registry.warm_up(document_types, model_name)
+
+
+def warm_up_in_background(document_types=None, model_name=None):
+    """
+    Warm up the process-wide registry on a daemon thread and return the thread.
+
+    Retrievers created meanwhile wait on the same per-resource locks, so
+    nothing is loaded twice.
+    """
+    def run():
+        try:
+            registry.warm_up(document_types, model_name)
+        except Exception as e:
+            print(f"[⚠️] Background warm-up failed: {e}")
+
+    thread = threading.Thread(target=run, name="lega-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def release(document_type=None, model_name=None):
+    """Release resources held by the process-wide registry."""
+    registry.release(document_type, model_name)
@@ -0,0 +1,121 @@
+# backend/retrieval_client.py
+
+import http.client
+import json
+import socket
+import threading
+from urllib.parse import urlparse
+
+from backend.tracing import span
+
+
+class RetrievalServiceError(Exception):
+    """Raised when the retrieval service rejects a request or cannot be reached."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RetrievalClient:
+    """
+    Client of the retrieval service (backend/retrieval_service.py).
+
+    Args:
+        url (str): http://host:port or unix:///path/to/socket
+        timeout (float): Seconds to wait for a reply
+
+    Each thread keeps one persistent connection to the service.
+    """
+
+    def __init__(self, url, timeout=30.0):
+        self.url = url
+        self.timeout = timeout
+        self._parsed = urlparse(url)
+        if self._parsed.scheme not in ("http", "unix"):
+            raise ValueError(f"Unsupported retrieval service URL '{url}', expected http://host:port or unix:///path")
+        self._local = threading.local()
+
+    def _connect(self):
+        if self._parsed.scheme == "unix":
+            return _UnixHTTPConnection(self._parsed.path, self.timeout)
+        return http.client.HTTPConnection(self._parsed.hostname, self._parsed.port or 80, timeout=self.timeout)
+
+    def _drop_connection(self):
+        self._local.connection.close()
+        self._local.connection = None
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+
+        # A kept-alive connection the service has since closed is retried once on a fresh one.
+        # Timeouts and other failures are not retried: the service may already be running the batch.
+        for attempt in range(2):
+            connection = getattr(self._local, "connection", None)
+            reused = connection is not None
+            if not reused:
+                connection = self._local.connection = self._connect()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                self._drop_connection()
+                if attempt or not reused:
+                    raise RetrievalServiceError(f"Retrieval service at {self.url} unreachable: {e}") from e
+            except socket.timeout as e:
+                self._drop_connection()
+                raise RetrievalServiceError(f"Retrieval service at {self.url} timed out after {self.timeout}s") from e
+            except (http.client.HTTPException, OSError) as e:
+                self._drop_connection()
+                raise RetrievalServiceError(f"Retrieval service at {self.url} unreachable: {e}") from e
+
+        reply = json.loads(data or b"{}")
+        if response.status != 200:
+            raise RetrievalServiceError(reply.get("error", f"HTTP {response.status}"), response.status)
+        return reply
+
+    def retrieve_across(self, requests):
+        """
+        Same contract as backend.retriever.retrieve_across, served remotely.
+
+        Args:
+            requests (list): (document_type, query_text, top_k) tuples
+        Returns:
+            list: One result list per request, in input order
+        """
+        if not requests:
+            return []
+        with span("remote_retrieve", requests=len(requests)):
+            reply = self._request("POST", "/retrieve", {"requests": [list(request) for request in requests]})
+        return reply["results"]
+
+    def health(self):
+        """Service status: loaded resources and batching counters."""
+        return self._request("GET", "/health")
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_retrieval_client(url, timeout=30.0):
+    """Return the process-wide client for a service URL."""
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = RetrievalClient(url, timeout)
+    return client
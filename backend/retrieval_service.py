@@ -0,0 +1,221 @@
+# backend/retrieval_service.py
+
+"""
+Retrieval daemon: one copy of the embedding model and indexes for every
+process on the machine.
+
+Requests arriving within a few milliseconds of each other are coalesced into
+one retrieve_across call, i.e. one model.encode batch and one FAISS search
+per index. Point the app or the batch runner at it with LEGA_RETRIEVAL_URL
+(or retrieval.service.url in config.yaml).
+
+Usage:
+    python -m backend.retrieval_service --port 8810
+    python -m backend.retrieval_service --socket /tmp/lega-retrieval.sock
+    LEGA_RETRIEVAL_URL=http://127.0.0.1:8810 streamlit run frontend/streamlit_app.py
+"""
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.metrics import RETRIEVAL_BATCH_SIZE, metrics
+from backend.registry import DOCUMENT_TYPES, registry as default_registry
+from backend.retriever import ALL_DOCUMENTS, retrieve_across
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent retrieval requests into batches.
+
+    The first waiting request opens a window of window_ms; everything queued
+    before it closes (up to max_batch requests) is served by one call.
+
+    Args:
+        handler (callable): Takes a list of (document_type, query_text, top_k) and returns one result per request
+        window_ms (float): How long to wait for more requests after the first
+        max_batch (int): Requests per batch at most
+    """
+
+    def __init__(self, handler, window_ms=5.0, max_batch=64):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, requests):
+        """Queue requests and block until their batch is served; returns their results."""
+        future = Future()
+        self._queue.put((list(requests), future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                size += len(batch[-1][0])
+            self._serve(batch)
+
+    def _serve(self, batch):
+        requests = [request for item_requests, _ in batch for request in item_requests]
+        self.batches += 1
+        self.requests += len(requests)
+        RETRIEVAL_BATCH_SIZE.observe(len(requests))
+        try:
+            results = self.handler(requests)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for item_requests, future in batch:
+            future.set_result(results[start:start + len(item_requests)])
+            start += len(item_requests)
+
+
+def parse_requests(payload):
+    """
+    Validate a /retrieve body so one bad client can't fail a shared batch.
+
+    Raises:
+        ValueError: If a request is malformed or names an unknown act
+    """
+    requests = payload.get("requests") if isinstance(payload, dict) else None
+    if not isinstance(requests, list):
+        raise ValueError("Body must be {\"requests\": [[document_type, query_text, top_k], ...]}")
+
+    parsed = []
+    for request in requests:
+        if not (isinstance(request, list) and len(request) == 3):
+            raise ValueError(f"Malformed request {request!r}")
+        document_type, query_text, top_k = request
+        if document_type not in DOCUMENT_TYPES and document_type != ALL_DOCUMENTS:
+            raise ValueError(f"Unknown document type: {document_type}")
+        if not isinstance(query_text, str) or not isinstance(top_k, int) or top_k < 1:
+            raise ValueError(f"Malformed request {request!r}")
+        parsed.append((document_type, query_text, top_k))
+    return parsed
+
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    batcher = None
+    registry = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/health":
+            self._send(200, dict(self.registry.status(), bundle=self.registry.bundle_version,
+                                 batches=self.batcher.batches, requests=self.batcher.requests))
+        elif path == "/metrics":
+            self._send(200, metrics.render(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/retrieve":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            requests = parse_requests(json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}"))
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+            return
+        try:
+            self._send(200, {"results": self.batcher.submit(requests)})
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # Unix sockets have no peer address; give handlers the (host, port) shape they expect
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def start_retrieval_service(host="127.0.0.1", port=0, socket_path=None, window_ms=None, max_batch=None, registry=None):
+    """
+    Start the retrieval service on a background thread.
+
+    Args:
+        port (int): TCP port; 0 picks a free one (ignored when socket_path is given)
+        socket_path (str): Serve on this Unix socket instead of TCP
+        window_ms (float): Batching window (defaults to retrieval.service.window_ms)
+        max_batch (int): Requests per batch at most (defaults to retrieval.service.max_batch)
+        registry (ResourceRegistry): Registry serving the requests (defaults to the process-wide one)
+    Returns:
+        tuple: (server, URL to pass as LEGA_RETRIEVAL_URL)
+    """
+    registry = registry or default_registry
+    settings = registry.settings["service"]
+    batcher = MicroBatcher(
+        lambda requests: retrieve_across(requests, registry=registry),
+        settings["window_ms"] if window_ms is None else window_ms,
+        max_batch or settings["max_batch"]
+    )
+    handler = type("ConfiguredRetrievalHandler", (RetrievalHandler,), {"batcher": batcher, "registry": registry})
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, handler)
+        url = f"unix://{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        url = f"http://{host}:{server.server_address[1]}"
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared retrieval service with request micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8810)
+    parser.add_argument("--socket", help="Serve on a Unix socket instead of TCP")
+    parser.add_argument("--window-ms", type=float, help="Batching window in milliseconds")
+    parser.add_argument("--max-batch", type=int, help="Requests per batch at most")
+    args = parser.parse_args()
+
+    print("[🔥] Loading embedding model and indexes...")
+    default_registry.warm_up()
+    server, url = start_retrieval_service(args.host, args.port, args.socket, args.window_ms, args.max_batch)
+    print(f"[🛰️] Retrieval service listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
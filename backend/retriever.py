@@ -1,79 +1,504 @@
 # backend/retriever.py
 
-import json
 import os
-import faiss
+import sqlite3
+import threading
+from collections import OrderedDict
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from backend.registry import registry as default_registry
+from backend.registry import DOCUMENT_TYPES
+from backend.lexical_index import parse_citation
+from backend.retrieval_client import get_retrieval_client
+from backend.tracing import span
+from backend.utils.config_loader import get_retrieval_service_url
+from backend.utils.helpers import clean_text
 
+# Pseudo document type: search every act and return the overall top-k
+ALL_DOCUMENTS = "all"
 
-class LegalRetriever:
-    def __init__(self, document_type="ipc"):
+
+class QueryEmbeddingCache:
+    """
+    Two-level cache of query embeddings keyed by (model name, normalized text).
+
+    An in-memory LRU sits in front of a SQLite store that survives restarts.
+    The store remembers which model produced its vectors and is wiped when a
+    different model opens it, so stale embeddings are never served.
+    """
+
+    def __init__(self, model_name, path=None, memory_size=1024):
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (text TEXT PRIMARY KEY, vector BLOB)")
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'model_name'").fetchone()
+            if row is None or row[0] != model_name:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('model_name', ?)", (model_name,))
+            self._db.commit()
+
+    @staticmethod
+    def normalize(text):
+        return clean_text(text)
+
+    def encode(self, model, texts):
         """
-        Initialize retriever for a specific legal document.
-        
+        Return embeddings for texts, encoding only the cache misses in one batch.
+
         Args:
-            document_type (str): One of ['ipc', 'crpc', 'evidence_act']
+            model: Embedding model with an encode(list) method
+            texts (list): Query strings
+        Returns:
+            np.ndarray: float32 embeddings, one row per text
         """
-        self.document_type = document_type
-        self.model = SentenceTransformer("bert-base-nli-mean-tokens")
+        keys = [self.normalize(text) for text in texts]
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[key] = vector
+                elif self._db is not None:
+                    row = self._db.execute("SELECT vector FROM embeddings WHERE text = ?", (key,)).fetchone()
+                    if row is not None:
+                        self.disk_hits += 1
+                        found[key] = np.frombuffer(row[0], dtype="float32")
+                        self._remember(key, found[key])
 
-        # Map doc type to FAISS index and sections
-        self.index_path = self._get_index_path()
-        self.sections_path = self._get_sections_path()
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            vectors = np.asarray(model.encode(missing), dtype="float32")
+            with self._lock:
+                self.misses += len(missing)
+                for key, vector in zip(missing, vectors):
+                    found[key] = vector
+                    self._remember(key, vector)
+                if self._db is not None:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                        [(key, vector.tobytes()) for key, vector in zip(missing, vectors)]
+                    )
+                    self._db.commit()
 
-        if not os.path.exists(self.index_path):
-            raise FileNotFoundError(f"Vector store not found at {self.index_path}")
+        return np.vstack([found[key] for key in keys])
 
-        if not os.path.exists(self.sections_path):
-            raise FileNotFoundError(f"Sections JSON not found at {self.sections_path}")
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
 
-        # Load FAISS index
-        self.index = faiss.read_index(self.index_path)
+    def clear(self):
+        """Drop every cached embedding, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
 
-        # Load corresponding sections
-        with open(self.sections_path, "r", encoding="utf-8") as f:
-            self.sections = json.load(f)
-
-    def _get_index_path(self):
-        base_path = "data/vectorstore"
+    def stats(self):
+        """Return hit/miss counters and the current in-memory size."""
         return {
-            "ipc": os.path.join(base_path, "ipc_vectorstore.faiss"),
-            "crpc": os.path.join(base_path, "crpc_vectorstore.faiss"),
-            "evidence_act": os.path.join(base_path, "evidence_act_vectorstore.faiss")
-        }[self.document_type]
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory)
+        }
 
-    def _get_sections_path(self):
-        base_path = "data/processed"
-        return {
-            "ipc": os.path.join(base_path, "ipc_sections.json"),
-            "crpc": os.path.join(base_path, "crpc_sections.json"),
-            "evidence_act": os.path.join(base_path, "evidence_act_sections.json")
-        }[self.document_type]
+
+_query_caches = {}
+_query_caches_lock = threading.Lock()
+
+
+def get_query_cache(model_name, settings):
+    """
+    Return the process-wide query cache for model_name, or None if disabled.
+    """
+    cache_settings = settings["query_cache"]
+    if not cache_settings.get("enabled"):
+        return None
+
+    key = (model_name, cache_settings.get("path"))
+    with _query_caches_lock:
+        cache = _query_caches.get(key)
+        if cache is None:
+            cache = QueryEmbeddingCache(model_name, cache_settings.get("path"), cache_settings.get("memory_size", 1024))
+            _query_caches[key] = cache
+    return cache
+
+
+def encode_queries(model, texts, registry=None, model_name=None):
+    """
+    Encode query texts through the query-embedding cache when it is enabled.
+    """
+    registry = registry or default_registry
+    cache = get_query_cache(model_name or registry.model_name, registry.settings)
+    with span("encode", queries=len(texts)):
+        if cache is None:
+            return np.asarray(model.encode(list(texts)), dtype="float32")
+        return cache.encode(model, list(texts))
+
+
+def rerank_exact(vectors, query_embs, indices):
+    """
+    Re-score candidate ids by exact squared L2 distance to full-precision vectors.
+
+    Args:
+        vectors (np.ndarray): float32 vectors (typically memory-mapped), one per index id
+        query_embs (np.ndarray): One query embedding per row
+        indices (np.ndarray): Candidate ids per query, -1 for padding
+    Returns:
+        tuple: (distances, indices) with each row sorted by exact distance
+    """
+    distances = np.full(indices.shape, np.inf, dtype="float32")
+    for row, ids in enumerate(indices):
+        valid = ids >= 0
+        candidates = np.asarray(vectors[ids[valid]], dtype="float32")
+        distances[row][valid] = ((candidates - query_embs[row]) ** 2).sum(axis=1)
+    order = np.argsort(distances, axis=1, kind="stable")
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+def fuse_rankings(rankings, top_k, rrf_k=60):
+    """
+    Reciprocal rank fusion of several ranked lists of sections.
+
+    Args:
+        rankings (list): Ranked lists of section keys (positions or any hashable), best first (empty lists allowed)
+        top_k (int): Number of fused results to return
+        rrf_k (int): RRF damping constant; larger values flatten the rank weights
+    Returns:
+        list: (fused distance, key) pairs, best first. The distance is
+        1 - RRF score / best possible score, so it lies in [0, 1), is 0 for a
+        section ranked first in every list, and sorts like an L2 distance.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, 1):
+            scores[idx] = scores.get(idx, 0.0) + 1.0 / (rrf_k + rank)
+    best = len(rankings) / (rrf_k + 1)
+    ranked = sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+    return [(1 - score / best, idx) for idx, score in ranked]
+
+
+class LegalRetriever:
+    def __init__(self, document_type="ipc", registry=None, service_url=None):
+        """
+        Initialize retriever for a specific legal document.
+
+        The embedding model, FAISS index and sections are borrowed from the
+        shared resource registry rather than loaded per instance. When the
+        registry is configured with a unified index, every act is served from
+        the combined corpus and results are filtered by act.
+
+        In remote mode nothing is loaded: queries go to the retrieval service
+        (backend/retrieval_service.py). It is used when service_url is given,
+        or when no registry is passed and a service URL is configured.
+
+        Args:
+            document_type (str): One of ['ipc', 'crpc', 'evidence_act', 'all']
+            registry (ResourceRegistry): Registry to borrow from (defaults to the process-wide one)
+            service_url (str): Retrieval service URL (http://host:port or unix:///path)
+        """
+        if document_type not in DOCUMENT_TYPES and document_type != ALL_DOCUMENTS:
+            raise ValueError(f"Unknown document type: {document_type}")
+
+        self.document_type = document_type
+        self.registry = registry or default_registry
+        self.doc_filter = None if document_type == ALL_DOCUMENTS else document_type
+
+        self.service_url = service_url or (None if registry else get_retrieval_service_url(self.registry.settings))
+        self.client = None
+        if self.service_url:
+            self.client = get_retrieval_client(self.service_url, self.registry.settings["service"]["timeout"])
+            self.model = self.corpora = self.index = self.sections = None
+            self.index_path = self.sections_path = self.bundle_version = None
+            return
+
+        self.model = self.registry.get_model()
+
+        if self.registry.settings["unified_index"] or document_type == ALL_DOCUMENTS:
+            self.corpora = [self.registry.get_corpus(name) for name in self.registry.corpus_names()]
+        else:
+            self.corpora = [self.registry.get_corpus(document_type)]
+
+        self.index_path = self.corpora[0].index_path
+        self.sections_path = self.corpora[0].sections_path
+        self.bundle_version = self.corpora[0].version
+        self.index = self.corpora[0].index
+        self.sections = self.corpora[0].sections
 
     def retrieve(self, query_text, top_k=3):
         """
         Retrieve the top-k most relevant sections for the given query.
         Returns list of dicts with section info + similarity score.
+
+        A query that only cites sections ("Section 302", "s. 154 CrPC") is
+        answered from the section-number map without encoding it.
+        """
+        return self.retrieve_many([query_text], top_k)[0]
+
+    def retrieve_many(self, queries, top_k=3):
         """
-        query_emb = self.model.encode([query_text])
-        distances, indices = self.index.search(np.array(query_emb), top_k)
+        Retrieve the top-k sections for several queries at once.
+
+        Explicit citations are looked up directly; all other uncached queries
+        are encoded in a single model.encode batch and searched with one
+        vectorized FAISS call.
+
+        Args:
+            queries (list): Query strings
+            top_k (int): Number of sections per query
+        Returns:
+            list: One result list per query, in input order
+        """
+        if not queries:
+            return []
+        if self.client:
+            return self.client.retrieve_across([(self.document_type, query, top_k) for query in queries])
+        results = [self.lookup_citation(query, top_k) for query in queries]
+        pending = [row for row, result in enumerate(results) if result is None]
+        if pending:
+            texts = [queries[row] for row in pending]
+            query_embs = encode_queries(self.model, texts, self.registry)
+            for row, result in zip(pending, self._search_embeddings(query_embs, [top_k] * len(texts), query_texts=texts)):
+                results[row] = result
+        return results
+
+    def lookup_citation(self, query_text, top_k=3, doc_filter=False):
+        """
+        Answer a query that only cites section numbers, without the encoder.
+
+        Args:
+            query_text (str): Query text
+            top_k (int): Maximum number of sections to return
+            doc_filter (str): Act to keep (None keeps all); defaults to this retriever's act
+        Returns:
+            list: Cited sections in citation order with score 0.0, or None if
+            the query is not an exact citation or cites nothing in these acts
+        """
+        citation = parse_citation(query_text)
+        if citation is None or not citation["exact"]:
+            return None
+        if doc_filter is False:
+            doc_filter = self.doc_filter
+        if doc_filter and citation["act"] and citation["act"] != doc_filter:
+            return None
+
+        results = []
+        for section_id in citation["section_ids"]:
+            for corpus in self.corpora:
+                for idx in self._cited_positions(corpus, [section_id], doc_filter or citation["act"]):
+                    results.append(self._format_result(corpus, idx, 0.0))
+        return results[:top_k] or None
+
+    @staticmethod
+    def _cited_positions(corpus, section_ids, act=None):
+        """Positions of the cited sections in a corpus, keeping only those of act if given."""
+        positions = []
+        for section_id in section_ids:
+            for idx in corpus.lexical.lookup(section_id):
+                corpus_act = corpus.doc_types[idx] if corpus.doc_types is not None else corpus.document_type
+                if not act or corpus_act == act:
+                    positions.append(idx)
+        return positions
+
+    def _search_embeddings(self, query_embs, top_ks, doc_filters=None, query_texts=None):
+        """
+        Search every corpus this retriever serves and merge the hits per query.
+
+        Args:
+            query_embs (np.ndarray): One embedding per row
+            top_ks (list): Number of results wanted per row
+            doc_filters (list): Act to keep per row (None keeps all); defaults to this retriever's act
+            query_texts (list): Query text per row; enables hybrid BM25 + dense ranking
+        """
+        query_embs = np.asarray(query_embs, dtype="float32")
+        if doc_filters is None:
+            doc_filters = [self.doc_filter] * len(top_ks)
+
+        hybrid = query_texts is not None and self.registry.settings["hybrid"]["enabled"]
+        # Hybrid ranking fuses a wider set of dense candidates than the results finally kept
+        fetch_k = max(max(top_ks), self.registry.settings["hybrid"]["candidates"]) if hybrid else max(top_ks)
+
+        hits = [[] for _ in top_ks]
+        with span("search", queries=len(top_ks), corpora=len(self.corpora)):
+            for corpus in self.corpora:
+                for row, row_hits in enumerate(self._search_corpus(corpus, query_embs, fetch_k, doc_filters)):
+                    hits[row].extend(row_hits)
+            if hybrid:
+                # Fuse once over the candidates of every corpus, so fused scores are comparable across acts
+                hits = self._fuse_lexical(hits, query_texts, max(top_ks), doc_filters)
 
         results = []
-        for i in range(len(indices[0])):
-            idx = indices[0][i]
-            distance = distances[0][i]
-
-            try:
-                section = self.sections[idx]
-                results.append({
-                    "doc_type": self.document_type.upper(),
-                    "section_id": section["section_id"],
-                    "title": section["title"],
-                    "content": section["content"][:500] + "..." if len(section["content"]) > 500 else section["content"],
-                    "score": float(distance)
-                })
-            except IndexError:
-                continue  # Skip invalid indices
-
-        return results
\ No newline at end of file
+        for row, top_k in enumerate(top_ks):
+            # Stable sort keeps FAISS order within a corpus on equal distances
+            ranked = sorted(hits[row], key=lambda hit: hit[0])[:top_k]
+            results.append([self._format_result(corpus, idx, distance) for distance, corpus, idx in ranked])
+        return results
+
+    def _search_corpus(self, corpus, query_embs, top_k, doc_filters):
+        ntotal = corpus.index.ntotal
+        if ntotal == 0:
+            return [[] for _ in doc_filters]
+
+        filtering = corpus.doc_types is not None and any(doc_filters)
+        fetch = top_k * self.registry.settings["filter_oversample"] if filtering else top_k
+        fetch *= corpus.rerank_factor or 1
+
+        while True:
+            # One search at the widest k; flat-index top-k lists are prefixes of wider ones
+            distances, indices = corpus.index.search(query_embs, min(fetch, ntotal))
+            if corpus.rerank_factor:
+                distances, indices = rerank_exact(corpus.vectors, query_embs, indices)
+            hits = []
+            for row, doc_filter in enumerate(doc_filters):
+                keep = indices[row] >= 0  # FAISS pads with -1 when fewer than top_k vectors exist
+                if filtering and doc_filter:
+                    keep &= corpus.doc_types[np.maximum(indices[row], 0)] == doc_filter
+                hits.append([(float(d), corpus, int(i)) for d, i in zip(distances[row][keep], indices[row][keep])][:top_k])
+
+            if not filtering or fetch >= ntotal or all(len(row_hits) >= top_k for row_hits in hits):
+                return hits
+            fetch *= 4
+
+    def _fuse_lexical(self, dense_hits, query_texts, top_k, doc_filters):
+        """
+        Re-rank the dense hits of every corpus together with their BM25 and
+        cited-section hits by a single reciprocal rank fusion per query.
+
+        Each ranking is merged across corpora first (dense hits by L2 distance,
+        BM25 hits by score), so one act's rankings never outweigh another's.
+        """
+        settings = self.registry.settings["hybrid"]
+        fused = []
+        for row, (query_text, doc_filter) in enumerate(zip(query_texts, doc_filters)):
+            dense = sorted(dense_hits[row], key=lambda hit: hit[0])[:settings["candidates"]]
+            lexical = []
+            for number, corpus in enumerate(self.corpora):
+                mask = None
+                if corpus.doc_types is not None and doc_filter:
+                    mask = corpus.doc_types == doc_filter
+                lexical.extend((-score, number, idx) for score, idx in
+                               corpus.lexical.search(query_text, settings["candidates"], mask, with_scores=True))
+            rankings = [
+                [(self.corpora.index(corpus), idx) for _, corpus, idx in dense],
+                [(number, idx) for _, number, idx in sorted(lexical)[:settings["candidates"]]]
+            ]
+
+            # Sections the query cites by number count as a third ranking, unless it cites another act
+            citation = parse_citation(query_text)
+            if citation and not (doc_filter and citation["act"] and citation["act"] != doc_filter):
+                rankings.append([
+                    (number, idx)
+                    for section_id in citation["section_ids"]
+                    for number, corpus in enumerate(self.corpora)
+                    for idx in self._cited_positions(corpus, [section_id], doc_filter or citation["act"])
+                ])
+
+            fused.append([
+                (distance, self.corpora[number], idx)
+                for distance, (number, idx) in fuse_rankings(rankings, top_k, settings["rrf_k"])
+            ])
+        return fused
+
+    def _format_result(self, corpus, idx, distance):
+        section = corpus.sections[idx]
+        return {
+            "doc_type": section.get("doc_type", corpus.document_type).upper(),
+            "section_id": section["section_id"],
+            "title": section["title"],
+            "content": section["content"],
+            "score": distance
+        }
+
+
+def retrieve_across(requests, registry=None):
+    """
+    Run retrieval requests spanning several legal documents in one batch.
+
+    Requests that only cite sections are answered by section-number lookup.
+    Every other distinct query text is encoded once in a single model.encode
+    call, and each index is searched once for all of its queries (a single
+    search in total when the unified index is enabled).
+
+    Without an explicit registry, requests go to the retrieval service when
+    one is configured (LEGA_RETRIEVAL_URL or retrieval.service.url).
+
+    Args:
+        requests (list): (document_type, query_text, top_k) tuples
+        registry (ResourceRegistry): Registry to borrow from (defaults to the process-wide one)
+    Returns:
+        list: One result list per request, in input order
+    """
+    if not requests:
+        return []
+
+    if registry is None:
+        service_url = get_retrieval_service_url(default_registry.settings)
+        if service_url:
+            client = get_retrieval_client(service_url, default_registry.settings["service"]["timeout"])
+            return client.retrieve_across(requests)
+
+    registry = registry or default_registry
+    if registry.settings["unified_index"]:
+        shared = LegalRetriever(document_type=ALL_DOCUMENTS, registry=registry)
+        retrievers = {doc: shared for doc, _, _ in requests}
+    else:
+        retrievers = {doc: LegalRetriever(document_type=doc, registry=registry) for doc, _, _ in requests}
+
+    # Explicit citations are answered from the section-number map, without encoding
+    results = [
+        retrievers[doc].lookup_citation(query_text, top_k, None if doc == ALL_DOCUMENTS else doc)
+        for doc, query_text, top_k in requests
+    ]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    texts = list(dict.fromkeys(requests[i][1] for i in pending))
+    model = registry.get_model()
+    embeddings = encode_queries(model, texts, registry)
+    row_of = {text: row for row, text in enumerate(texts)}
+
+    if registry.settings["unified_index"]:
+        retriever = shared
+        doc_filters = [None if requests[i][0] == ALL_DOCUMENTS else requests[i][0] for i in pending]
+        batch = retriever._search_embeddings(
+            embeddings[[row_of[requests[i][1]] for i in pending]],
+            [requests[i][2] for i in pending],
+            doc_filters,
+            [requests[i][1] for i in pending]
+        )
+        for position, result in zip(pending, batch):
+            results[position] = result
+        return results
+
+    for document_type, retriever in retrievers.items():
+        positions = [i for i in pending if requests[i][0] == document_type]
+        if not positions:
+            continue
+        batch = retriever._search_embeddings(
+            embeddings[[row_of[requests[i][1]] for i in positions]],
+            [requests[i][2] for i in positions],
+            query_texts=[requests[i][1] for i in positions]
+        )
+        for position, result in zip(positions, batch):
+            results[position] = result
+
+    return results
@@ -0,0 +1,97 @@
+# backend/section_store.py
+
+import json
+import mmap
+import os
+
+import numpy as np
+
+
+def get_section_store_paths(json_path):
+    """
+    Return the (records, offsets) paths of the section store derived from a sections JSON.
+    """
+    base = os.path.splitext(json_path)[0]
+    return base + ".jsonl", base + ".offsets.npy"
+
+
+def write_section_store(sections, json_path):
+    """
+    Write sections as a read-only store: one JSON record per line plus an
+    array of byte offsets, so any record can be decoded on its own.
+
+    Files are written to temporary names and moved into place, so readers
+    never see a half-written store.
+
+    Args:
+        sections (list): Section dicts
+        json_path (str): Sections JSON the store is derived from
+    Returns:
+        tuple: (records path, offsets path)
+    """
+    records_path, offsets_path = get_section_store_paths(json_path)
+    offsets = [0]
+
+    with open(records_path + ".tmp", "wb") as f:
+        for section in sections:
+            f.write(json.dumps(section, ensure_ascii=False).encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+
+    with open(offsets_path + ".tmp", "wb") as f:
+        np.save(f, np.array(offsets, dtype=np.uint64))
+
+    os.replace(records_path + ".tmp", records_path)
+    os.replace(offsets_path + ".tmp", offsets_path)
+    return records_path, offsets_path
+
+
+def section_store_is_current(json_path):
+    """True if a section store exists and is at least as new as its JSON source."""
+    records_path, offsets_path = get_section_store_paths(json_path)
+    if not (os.path.exists(records_path) and os.path.exists(offsets_path)):
+        return False
+    return not os.path.exists(json_path) or os.path.getmtime(records_path) >= os.path.getmtime(json_path)
+
+
+class SectionStore:
+    """
+    Memory-mapped, list-like view over a section store.
+
+    Records are decoded only when indexed, and the mapped pages are shared
+    through the OS page cache between every process reading the same files.
+    """
+
+    def __init__(self, json_path):
+        records_path, offsets_path = get_section_store_paths(json_path)
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        with open(records_path, "rb") as f:
+            self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(records_path) else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        idx = int(idx)
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("section index out of range")
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return json.loads(self._records[start:end])
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+if __name__ == "__main__":
+    PROCESSED_DIR = os.path.join("data", "processed")
+
+    for json_file in sorted(os.listdir(PROCESSED_DIR)):
+        if not json_file.endswith("_sections.json"):
+            continue
+        json_path = os.path.join(PROCESSED_DIR, json_file)
+        with open(json_path, "r", encoding="utf-8") as f:
+            sections = json.load(f)
+        records_path, _ = write_section_store(sections, json_path)
+        print(f"[💾] {len(sections)} sections from {json_file} -> {records_path}")
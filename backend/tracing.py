@@ -0,0 +1,115 @@
+# backend/tracing.py
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.metrics import SPAN_SECONDS, LLM_TOKENS
+
+
+_current_trace = contextvars.ContextVar("lega_trace", default=None)
+_current_stage = contextvars.ContextVar("lega_stage", default=None)
+
+
+class Trace:
+    """
+    Timed spans and token usage recorded while one trial runs.
+
+    Spans are appended from whichever thread or task runs the stage; each
+    carries the name of the stage that was current when it was recorded.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, duration, **attributes):
+        span = {
+            "stage": _current_stage.get(),
+            "name": name,
+            "start": round(start - self._start, 4),
+            "duration": round(duration, 4)
+        }
+        span.update(attributes)
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        """
+        Summarize the trace: every span, plus per-stage totals of time per span
+        name and of prompt/completion tokens.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+
+        stages = {}
+        for span in spans:
+            summary = stages.setdefault(span["stage"] or "trial", {"seconds": {}, "prompt_tokens": 0, "completion_tokens": 0})
+            summary["seconds"][span["name"]] = round(summary["seconds"].get(span["name"], 0.0) + span["duration"], 4)
+            summary["prompt_tokens"] += span.get("prompt_tokens") or 0
+            summary["completion_tokens"] += span.get("completion_tokens") or 0
+
+        return {
+            "stages": stages,
+            "prompt_tokens": sum(summary["prompt_tokens"] for summary in stages.values()),
+            "completion_tokens": sum(summary["completion_tokens"] for summary in stages.values()),
+            "spans": spans
+        }
+
+
+@contextmanager
+def start_trace():
+    """
+    Make a new Trace current for the enclosed block and yield it.
+
+    Threads started with copy_context() (and asyncio.to_thread) inherit it.
+    """
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def stage_context(stage):
+    """Attribute spans recorded in the enclosed block to the named trial stage."""
+    token = _current_stage.set(stage)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time the enclosed block as a span of the current trace (if any) and in the
+    lega_span_seconds histogram.
+
+    Yields a dict; keys added to it inside the block (e.g. token counts) are
+    stored on the span.
+    """
+    extra = dict(attributes)
+    start = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        duration = time.perf_counter() - start
+        SPAN_SECONDS.observe(duration, span=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(name, start, duration, **extra)
+
+
+def record_usage(current_span, usage):
+    """Store the API usage field's token counts on a span and in lega_llm_tokens_total."""
+    if usage is None:
+        return
+    current_span["prompt_tokens"] = usage.prompt_tokens
+    current_span["completion_tokens"] = usage.completion_tokens
+    LLM_TOKENS.inc(usage.prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens, kind="completion")
@@ -0,0 +1,128 @@
+# backend/trial_retrieval.py
+
+import contextvars
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from backend import retriever
+from backend.tracing import span
+
+
+_current_retrieval = contextvars.ContextVar("lega_trial_retrieval", default=None)
+
+
+class TrialRetrieval:
+    """
+    Retrieval results shared by the agents of one trial.
+
+    Requests for the same (document_type, query_text) are searched once, at
+    the largest top_k any agent asks for; each agent gets the first top_k
+    results of that search. Requests known before the trial starts are
+    fetched together by prefetch(); later ones (queries built from earlier
+    arguments) are fetched on first use and remembered for the rest of the
+    trial.
+
+    Args:
+        registry (ResourceRegistry): Registry to borrow from (defaults to the process-wide one,
+            or the retrieval service when one is configured)
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.requested = 0
+        self.searched = 0
+        self.batches = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, requests):
+        """Fetch planned requests in one batch, merging duplicates."""
+        self._fetch(requests)
+
+    def retrieve_across(self, requests):
+        """
+        Same contract as backend.retriever.retrieve_across, served from this trial's results.
+        """
+        with self._lock:
+            self.requested += len(requests)
+        entries = self._fetch(requests)
+        return [entries[(doc, query_text)].result()[:top_k] for doc, query_text, top_k in requests]
+
+    def _fetch(self, requests):
+        # (doc, query) -> widest top_k requested in this call
+        wanted = {}
+        for doc, query_text, top_k in requests:
+            key = (doc, query_text)
+            wanted[key] = max(wanted.get(key, 0), top_k)
+
+        # Claim the missing (or too narrow) entries under the lock, search outside it
+        entries = {}
+        missing = []
+        with self._lock:
+            for key, top_k in wanted.items():
+                entry = self._entries.get(key)
+                if entry is None or entry.top_k < top_k:
+                    entry = Future()
+                    entry.top_k = top_k
+                    self._entries[key] = entry
+                    missing.append((key, entry))
+                entries[key] = entry
+            if missing:
+                self.searched += len(missing)
+                self.batches += 1
+
+        if missing:
+            try:
+                with span("trial_retrieval", requests=len(missing)):
+                    results = retriever.retrieve_across(
+                        [(doc, query_text, entry.top_k) for (doc, query_text), entry in missing],
+                        registry=self.registry
+                    )
+            except Exception as e:
+                # Forget failed entries so a later request can retry them
+                with self._lock:
+                    for key, entry in missing:
+                        if self._entries.get(key) is entry:
+                            del self._entries[key]
+                for _, entry in missing:
+                    entry.set_exception(e)
+                raise
+            for (_, entry), result in zip(missing, results):
+                entry.set_result(result)
+        return entries
+
+    def stats(self):
+        """Requests served during the trial, and the searches and batches they took."""
+        with self._lock:
+            return {"requested": self.requested, "searched": self.searched, "batches": self.batches}
+
+
+@contextmanager
+def trial_retrieval(registry=None):
+    """
+    Make a new TrialRetrieval current for the enclosed block and yield it.
+
+    Like the trace, it follows stages into worker threads and tasks.
+    """
+    retrieval = TrialRetrieval(registry)
+    token = _current_retrieval.set(retrieval)
+    try:
+        yield retrieval
+    finally:
+        _current_retrieval.reset(token)
+
+
+def retrieve_across(requests):
+    """
+    Retrieve through the current trial's shared results, or directly outside a trial.
+
+    Args:
+        requests (list): (document_type, query_text, top_k) tuples
+    Returns:
+        list: One result list per request, in input order
+    """
+    retrieval = _current_retrieval.get()
+    if retrieval is None:
+        return retriever.retrieve_across(requests)
+    return retrieval.retrieve_across(requests)
@@ -20,9 +20,206 @@ def get_groq_model():
     return config.get("groq", {}).get("model", "llama3-70b-8192")
 
 
+def get_groq_base_url(default="https://api.groq.com/openai/v1"):
+    """
+    Get the chat completions base URL.
+
+    The LEGA_LLM_BASE_URL environment variable overrides groq.base_url in
+    config, e.g. to point the agents at a local OpenAI-compatible server.
+    """
+    override = os.getenv("LEGA_LLM_BASE_URL")
+    if override:
+        return override
+    config = load_config()
+    return (config.get("groq") or {}).get("base_url") or default
+
+
 def get_vectorstore_path():
     """
     Get vectorstore path from config.
     """
     config = load_config()
-    return config.get("vectorstore_path", "data/vectorstore/ipc_vectorstore.faiss")
\ No newline at end of file
+    return config.get("vectorstore_path", "data/vectorstore/ipc_vectorstore.faiss")
+
+
+RETRIEVAL_DEFAULTS = {
+    "unified_index": False,
+    "filter_oversample": 4,
+    "mmap": True,
+    "hybrid": {
+        "enabled": True,
+        "candidates": 20,
+        "rrf_k": 60
+    },
+    "query_cache": {
+        "enabled": True,
+        "memory_size": 1024,
+        "path": "data/cache/query_embeddings.sqlite"
+    },
+    "service": {
+        "url": "",
+        "window_ms": 5,
+        "max_batch": 64,
+        "timeout": 30
+    },
+    "bundles": {
+        "dir": "data/bundles",
+        "verify_checksums": True,
+        "poll_seconds": 0
+    }
+}
+
+
+def get_retrieval_settings():
+    """
+    Get retrieval settings from config, filled in with defaults.
+    """
+    config = load_config()
+    settings = dict(RETRIEVAL_DEFAULTS)
+    for key, value in (config.get("retrieval") or {}).items():
+        if isinstance(value, dict) and isinstance(settings.get(key), dict):
+            value = dict(settings[key], **value)
+        settings[key] = value
+    return settings
+
+
+def get_retrieval_service_url(settings=None):
+    """
+    Get the retrieval service URL (http://host:port or unix:///path), or None
+    to retrieve in-process.
+
+    The LEGA_RETRIEVAL_URL environment variable overrides retrieval.service.url.
+    """
+    override = os.getenv("LEGA_RETRIEVAL_URL")
+    if override:
+        return override
+    settings = settings or get_retrieval_settings()
+    return settings["service"]["url"] or None
+
+
+VECTOR_INDEX_DEFAULTS = {
+    "type": "flat",
+    "nlist": 0,
+    "nprobe": 8,
+    "pq_m": 16,
+    "pq_nbits": 8,
+    "hnsw_m": 32,
+    "ef_construction": 80,
+    "ef_search": 64,
+    "train_sample_size": 20000,
+    "rerank_factor": 0,
+    "seed": 42
+}
+
+
+def get_vector_index_settings():
+    """
+    Get vector index build settings from config, filled in with defaults.
+    """
+    config = load_config()
+    settings = dict(VECTOR_INDEX_DEFAULTS)
+    settings.update(config.get("vector_index") or {})
+    return settings
+
+
+LLM_CACHE_DEFAULTS = {
+    "mode": "read_write",
+    "path": "data/cache/llm_responses.sqlite",
+    "ttl_seconds": 604800,
+    "max_entries": 5000
+}
+
+
+def get_llm_cache_settings():
+    """
+    Get LLM response cache settings from config, filled in with defaults.
+    """
+    config = load_config()
+    settings = dict(LLM_CACHE_DEFAULTS)
+    settings.update(config.get("llm_cache") or {})
+    return settings
+
+
+RATE_LIMIT_DEFAULTS = {
+    "enabled": True,
+    "requests_per_minute": 30,
+    "tokens_per_minute": 6000,
+    "max_retries": 5,
+    "backoff_base_seconds": 1.0,
+    "backoff_max_seconds": 30.0
+}
+
+
+def get_rate_limit_settings():
+    """
+    Get LLM rate limit and retry settings from config, filled in with defaults.
+    """
+    config = load_config()
+    settings = dict(RATE_LIMIT_DEFAULTS)
+    settings.update(config.get("rate_limit") or {})
+    return settings
+
+
+EMBEDDING_DEFAULTS = {
+    "model_name": "bert-base-nli-mean-tokens",
+    "backend": "sentence_transformers",
+    "onnx_dir": "data/models",
+    "max_length": 256,
+    "batch_size": 32,
+    "threads": 0
+}
+
+
+def get_embedding_settings():
+    """
+    Get embedding model and backend settings from config, filled in with defaults.
+
+    The model comes from the top-level embedding_model key, the backend options
+    from the embedding section.
+    """
+    config = load_config()
+    settings = dict(EMBEDDING_DEFAULTS)
+    settings.update(config.get("embedding") or {})
+    settings["model_name"] = config.get("embedding_model") or settings["model_name"]
+    return settings
+
+
+CONTEXT_DEFAULTS = {
+    "tokenizer": "cl100k_base",
+    "cache_dir": "data/cache/tiktoken",
+    "min_section_tokens": 48,
+    "overlap_threshold": 0.8,
+    "context_tokens": 900,
+    "argument_tokens": 200
+}
+
+
+def get_context_settings(agent=None):
+    """
+    Get prompt context packing settings, filled in with defaults.
+
+    Tokenizer and dedupe options come from the context section; the token
+    budgets (context_tokens, argument_tokens) from agent_settings.<agent>.
+    """
+    config = load_config()
+    settings = dict(CONTEXT_DEFAULTS)
+    settings.update(config.get("context") or {})
+    if agent:
+        agent_settings = (config.get("agent_settings") or {}).get(agent) or {}
+        settings.update({key: agent_settings[key] for key in ("context_tokens", "argument_tokens") if key in agent_settings})
+    return settings
+
+
+APP_DEFAULTS = {
+    "background_warm_up": True
+}
+
+
+def get_app_settings():
+    """
+    Get Streamlit app settings from config, filled in with defaults.
+    """
+    config = load_config()
+    settings = dict(APP_DEFAULTS)
+    settings.update(config.get("app") or {})
+    return settings
@@ -20,4 +20,15 @@ def format_ipc_citation(section):
 
 def format_legal_citation(section):
     """Format any legal section with document type."""
-    return f"{section['doc_type']} Section {section['section_id']}: {section['title']}"
\ No newline at end of file
+    return f"{section['doc_type']} Section {section['section_id']}: {section['title']}"
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values, interpolating linearly between ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
@@ -0,0 +1,155 @@
+# benchmarks/index_report.py
+
+"""
+Recall-vs-latency report for the index types supported by build_vectorstore.
+
+Every configuration is compared against the exact IndexFlatL2 baseline on the
+same vectors, so a setting can be picked per corpus size. Compressed index
+types are also measured with exact re-ranking of rerank_factor * k candidates
+against the float32 vectors; size_kb counts only the index, since the
+re-ranking vectors stay memory-mapped on disk.
+
+Usage:
+    python -m benchmarks.index_report --corpus crpc --k 10 --queries 200 --rerank 2 4
+"""
+
+import argparse
+import json
+import os
+import time
+
+import faiss
+import numpy as np
+
+from backend.embedding_manager import LOSSY_INDEX_TYPES, create_index
+from backend.registry import DOCUMENT_TYPES, get_index_path, get_sections_path, get_vectors_path, registry
+from backend.retriever import rerank_exact
+from backend.utils.config_loader import VECTOR_INDEX_DEFAULTS
+
+# (index type, search parameter name, values swept at query time)
+CONFIGURATIONS = [
+    ("flat", None, [None]),
+    ("ivf_flat", "nprobe", [1, 4, 8, 16]),
+    ("ivf_pq", "nprobe", [4, 8, 16]),
+    ("hnsw", "efSearch", [16, 32, 64, 128]),
+    ("sq_fp16", None, [None]),
+    ("sq_int8", None, [None])
+]
+
+
+def load_vectors(document_type):
+    """
+    Load a corpus' full-precision vectors: the saved re-ranking vectors, else
+    the stored index, re-embedding the sections if the stored index cannot
+    reconstruct them exactly (e.g. PQ or scalar-quantized).
+    """
+    index_path = get_index_path(document_type)
+    if os.path.exists(get_vectors_path(index_path)):
+        return np.load(get_vectors_path(index_path))
+    index = faiss.read_index(index_path)
+    if not isinstance(index, faiss.IndexScalarQuantizer):
+        try:
+            return index.reconstruct_n(0, index.ntotal)
+        except RuntimeError:
+            pass
+
+    with open(get_sections_path(document_type), "r", encoding="utf-8") as f:
+        sections = json.load(f)
+    return registry.get_model().encode([sec["content"] for sec in sections])
+
+
+def make_queries(vectors, count, seed=0):
+    """Sample corpus vectors and perturb them so queries aren't exact self-matches."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), min(count, len(vectors)), replace=False)
+    noise = rng.normal(0, 0.1 * vectors.std(axis=0), size=(len(rows), vectors.shape[1]))
+    return (vectors[rows] + noise).astype("float32")
+
+
+def measure(index, queries, k, vectors=None, rerank_factor=0):
+    """
+    Search one query at a time, as the app does; return ids and per-query
+    latencies in ms. With a rerank factor, rerank_factor * k candidates are
+    re-scored exactly against vectors.
+    """
+    ids = []
+    latencies = []
+    fetch = min(k * (rerank_factor or 1), index.ntotal)
+    for query in queries:
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], fetch)
+        if rerank_factor:
+            _, found = rerank_exact(vectors, query[None, :], found)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(found[0][:k])
+    return np.array(ids), np.array(latencies)
+
+
+def recall_at_k(found, exact):
+    """Fraction of the exact top-k that the approximate search also returned."""
+    hits = [len(set(f[f >= 0]) & set(e)) / len(e) for f, e in zip(found, exact)]
+    return float(np.mean(hits))
+
+
+def run_report(document_type, k=10, query_count=200, rerank_factors=(2, 4)):
+    vectors = load_vectors(document_type)
+    queries = make_queries(vectors, query_count)
+    k = min(k, len(vectors))
+
+    exact_index, _ = create_index(vectors, dict(VECTOR_INDEX_DEFAULTS, type="flat"))
+    _, exact = exact_index.search(queries, k)
+
+    rows = []
+    for index_type, param_name, values in CONFIGURATIONS:
+        settings = dict(VECTOR_INDEX_DEFAULTS, type=index_type)
+        build_start = time.perf_counter()
+        index, _ = create_index(vectors, settings)
+        build_seconds = time.perf_counter() - build_start
+        size_bytes = len(faiss.serialize_index(index))
+
+        factors = (0,) + tuple(rerank_factors) if index_type in LOSSY_INDEX_TYPES else (0,)
+        for value in values:
+            if param_name:
+                faiss.ParameterSpace().set_index_parameter(index, param_name, value)
+            for factor in factors:
+                found, latencies = measure(index, queries, k, vectors, factor)
+                rows.append({
+                    "index_type": index_type,
+                    "search_param": f"{param_name}={value}" if param_name else "-",
+                    "rerank": f"x{factor}" if factor else "-",
+                    f"recall@{k}": round(recall_at_k(found, exact), 4),
+                    "mean_ms": round(float(latencies.mean()), 4),
+                    "p95_ms": round(float(np.percentile(latencies, 95)), 4),
+                    "size_kb": round(size_bytes / 1024, 1),
+                    "build_s": round(build_seconds, 3)
+                })
+
+    return {"corpus": document_type, "vectors": int(len(vectors)), "queries": int(len(queries)), "k": k, "rows": rows}
+
+
+def print_report(report):
+    print(f"\n[📊] {report['corpus']}: {report['vectors']} vectors, {report['queries']} queries, k={report['k']}")
+    headers = list(report["rows"][0])
+    print("| " + " | ".join(headers) + " |")
+    print("|" + "---|" * len(headers))
+    for row in report["rows"]:
+        print("| " + " | ".join(str(row[h]) for h in headers) + " |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall-vs-latency report for FAISS index types")
+    parser.add_argument("--corpus", choices=DOCUMENT_TYPES, nargs="*", default=list(DOCUMENT_TYPES))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rerank", type=int, nargs="*", default=[2, 4], help="Re-rank factors tried on compressed index types")
+    parser.add_argument("--output", help="Optional path to write the report as JSON")
+    args = parser.parse_args()
+
+    reports = [run_report(document_type, args.k, args.queries, tuple(args.rerank)) for document_type in args.corpus]
+    for report in reports:
+        print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=4)
+        print(f"\n[💾] Report saved to: {args.output}")
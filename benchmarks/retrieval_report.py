@@ -0,0 +1,147 @@
+# benchmarks/retrieval_report.py
+
+"""
+Citation accuracy and speed of retrieval against a labelled gold set.
+
+Each line of the gold set names an act, a natural-language query and the
+section that should be cited for it. The report gives recall@k and MRR,
+per-query encode and search latency, and index memory. By default the
+stored indexes are evaluated as the app serves them; --index-type rebuilds
+each index in memory (from cached section embeddings) so a different index
+type or embedding model can be compared before anything is written to disk.
+--hybrid ranks with the retriever's BM25 + dense fusion instead of dense search alone.
+
+Usage:
+    python -m benchmarks.retrieval_report
+    python -m benchmarks.retrieval_report --index-type hnsw --k 1 3 5 10 --output retrieval.json
+    python -m benchmarks.retrieval_report --model all-MiniLM-L6-v2@onnx_int8
+    python -m benchmarks.retrieval_report --hybrid
+"""
+
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from backend.embedding_manager import INDEX_TYPES, SectionEmbeddingCache, create_index, embed_sections
+from backend.registry import DOCUMENT_TYPES, registry
+from backend.retriever import fuse_rankings
+from backend.utils.config_loader import get_vector_index_settings
+from backend.utils.helpers import percentile
+
+GOLD_PATH = "benchmarks/data/retrieval_gold.jsonl"
+
+
+def load_gold(path=GOLD_PATH):
+    """Read (doc_type, query, section_id) records from the gold JSONL."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_index(document_type, model_name, index_type=None):
+    """
+    Return (index, sections) for an act: the stored index, or one rebuilt in
+    memory with the given index type and model.
+    """
+    corpus = registry.get_corpus(document_type)
+    if index_type is None and model_name == registry.model_name:
+        return corpus.index, corpus.sections
+
+    sections = list(corpus.sections)
+    embeddings, _ = embed_sections([sec["content"] for sec in sections], model_name, SectionEmbeddingCache())
+    settings = dict(get_vector_index_settings(), type=index_type or get_vector_index_settings()["type"])
+    index, _ = create_index(embeddings, settings)
+    return index, sections
+
+
+def evaluate(document_type, gold, model_name=None, index_type=None, ks=(1, 3, 5, 10), hybrid=False):
+    """
+    Run every gold query for one act, one query at a time as the agents do.
+
+    A query counts as a hit at k if any of the top-k sections carries the
+    expected section number. Coverage is the share of gold sections that
+    exist in the corpus at all; misses outside it point at ingestion, not search.
+    With hybrid, search time includes BM25 scoring and rank fusion.
+    """
+    model_name = model_name or registry.model_name
+    index, sections = load_index(document_type, model_name, index_type)
+    model = registry.get_model(model_name)
+    section_ids = [str(sec["section_id"]).lower() for sec in sections]
+    present = set(section_ids)
+    max_k = min(max(ks), index.ntotal)
+    hybrid_settings = registry.settings["hybrid"]
+    lexical = registry.get_corpus(document_type).lexical if hybrid else None
+    fetch_k = min(max(max_k, hybrid_settings["candidates"]), index.ntotal) if hybrid else max_k
+
+    ranks = []
+    encode_ms = []
+    search_ms = []
+    for record in gold:
+        start = time.perf_counter()
+        query_emb = np.asarray(model.encode([record["query"]]), dtype="float32")
+        encode_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        _, found = index.search(query_emb, fetch_k)
+        if lexical is not None:
+            rankings = [[int(idx) for idx in found[0] if idx >= 0], lexical.search(record["query"], hybrid_settings["candidates"])]
+            found = [[idx for _, idx in fuse_rankings(rankings, max_k, hybrid_settings["rrf_k"])]]
+        search_ms.append((time.perf_counter() - start) * 1000)
+
+        expected = str(record["section_id"]).lower()
+        hits = [rank for rank, idx in enumerate(found[0], 1) if idx >= 0 and section_ids[idx] == expected]
+        ranks.append(hits[0] if hits else None)
+
+    count = len(gold)
+    return {
+        "corpus": document_type,
+        "queries": count,
+        "coverage": round(sum(str(r["section_id"]).lower() in present for r in gold) / count, 4),
+        **{f"recall@{k}": round(sum(1 for r in ranks if r and r <= k) / count, 4) for k in ks},
+        "mrr": round(sum(1 / r for r in ranks if r) / count, 4),
+        "encode_p50_ms": round(percentile(encode_ms, 50), 3),
+        "encode_p95_ms": round(percentile(encode_ms, 95), 3),
+        "search_p50_ms": round(percentile(search_ms, 50), 3),
+        "search_p95_ms": round(percentile(search_ms, 95), 3),
+        "index_kb": round(len(faiss.serialize_index(index)) / 1024, 1)
+    }
+
+
+def run_report(gold, model_name=None, index_type=None, ks=(1, 3, 5, 10), hybrid=False):
+    model_name = model_name or registry.model_name
+    rows = []
+    for document_type in DOCUMENT_TYPES:
+        records = [record for record in gold if record["doc_type"] == document_type]
+        if records:
+            rows.append(evaluate(document_type, records, model_name, index_type, ks, hybrid))
+    return {"model": model_name, "index_type": index_type or "stored", "ranking": "hybrid" if hybrid else "dense", "rows": rows}
+
+
+def print_report(report):
+    print(f"\n[📊] Retrieval gold set: model={report['model']}, index={report['index_type']}, ranking={report['ranking']}")
+    headers = list(report["rows"][0])
+    print("| " + " | ".join(headers) + " |")
+    print("|" + "---|" * len(headers))
+    for row in report["rows"]:
+        print("| " + " | ".join(str(row[h]) for h in headers) + " |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k, MRR and latency of retrieval on the gold set")
+    parser.add_argument("--gold", default=GOLD_PATH)
+    parser.add_argument("--model", help="Embedding model id to evaluate, e.g. all-MiniLM-L6-v2@onnx_int8 (default: configured)")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="Rebuild indexes in memory with this type instead of using the stored ones")
+    parser.add_argument("--hybrid", action="store_true", help="Fuse BM25 and dense rankings as the retriever does")
+    parser.add_argument("--k", type=int, nargs="*", default=[1, 3, 5, 10])
+    parser.add_argument("--output", help="Optional path to write the report as JSON")
+    args = parser.parse_args()
+
+    report = run_report(load_gold(args.gold), args.model, args.index_type, tuple(args.k), args.hybrid)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"\n[💾] Report saved to: {args.output}")
@@ -0,0 +1,142 @@
+# benchmarks/startup_report.py
+
+"""
+Cold-start benchmark.
+
+Each run starts a fresh Python process and measures what a new app server
+pays before and during its first trials: importing backend.core, building
+the CourtroomSimulator, and the first and second trial. Two modes are
+compared:
+
+    cold        the first trial loads the embedding model and indexes itself
+    background  warm-up starts right after import (as the Streamlit app does)
+                and the first trial is submitted --idle seconds later,
+                i.e. while a user would still be typing the case
+
+The agents talk to the bundled stub LLM server, so the numbers measure
+imports, model/index loading and retrieval, not the LLM.
+
+Usage:
+    python -m benchmarks.startup_report --runs 5 --idle 3
+    python -m benchmarks.startup_report --modes cold --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.stub_llm_server import StubOptions, start_stub_server
+from benchmarks.trial_latency import SCENARIOS
+
+MODES = ("cold", "background")
+# Modules that should only load once a trial (or warm-up) needs them
+HEAVY_MODULES = ("faiss", "torch", "sentence_transformers", "onnxruntime", "openai", "httpx", "tiktoken")
+PHASES = ("import_s", "init_s", "first_trial_s", "second_trial_s")
+
+
+def measure_startup(mode, idle):
+    """
+    Measure one process start. Must run in a fresh interpreter (see --child).
+
+    Returns:
+        dict: Phase durations in seconds and the heavy modules loaded by the import
+    """
+    start = time.perf_counter()
+    from backend.core import CourtroomSimulator
+    import_s = time.perf_counter() - start
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from backend.rate_limiter import configure_rate_limiter
+    from backend.registry import warm_up_in_background
+
+    configure_rate_limiter()
+    if mode == "background":
+        warm_up_in_background()
+        time.sleep(idle)
+
+    start = time.perf_counter()
+    simulator = CourtroomSimulator()
+    init_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    simulator.run_trial(SCENARIOS[0])
+    first_trial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    simulator.run_trial(SCENARIOS[1])
+    second_trial_s = time.perf_counter() - start
+
+    return {
+        "import_s": round(import_s, 3),
+        "init_s": round(init_s, 3),
+        "first_trial_s": round(first_trial_s, 3),
+        "second_trial_s": round(second_trial_s, 3),
+        "heavy_modules_after_import": loaded
+    }
+
+
+def run_child(mode, idle, env):
+    """Run measure_startup in a fresh interpreter and return its result."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_report", "--child", mode, "--idle", str(idle)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    # The child's last line is its JSON result; everything before it is status output
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark(modes, runs, idle, env):
+    """
+    Returns:
+        dict: Per mode, the median of each phase over runs plus the raw samples
+    """
+    report = {"runs": runs, "idle_s": idle, "modes": {}}
+    for mode in modes:
+        samples = [run_child(mode, idle, env) for _ in range(runs)]
+        report["modes"][mode] = {
+            "median": {phase: round(statistics.median(sample[phase] for sample in samples), 3) for phase in PHASES},
+            "heavy_modules_after_import": sorted({name for sample in samples for name in sample["heavy_modules_after_import"]}),
+            "samples": samples
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n{'mode':<12}" + "".join(f"{phase:>16}" for phase in PHASES))
+    for mode, stats in report["modes"].items():
+        print(f"{mode:<12}" + "".join(f"{stats['median'][phase]:>16.3f}" for phase in PHASES))
+    for mode, stats in report["modes"].items():
+        heavy = ", ".join(stats["heavy_modules_after_import"]) or "none"
+        print(f"[📦] {mode}: heavy modules loaded by 'import backend.core': {heavy}")
+    print(f"\n[📊] Medians of {report['runs']} fresh processes per mode; background mode idles {report['idle_s']}s before the first trial")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark process start-up and first-trial latency")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--idle", type=float, default=3.0, help="Background mode: seconds between app start and the first trial")
+    parser.add_argument("--output", help="Optional JSON report path")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_startup(args.child, args.idle)))
+        sys.exit(0)
+
+    _, base_url = start_stub_server(options=StubOptions(0.0, 0.0, 50))
+    print(f"[🧪] Stub LLM server listening on {base_url}")
+    env = dict(os.environ, LEGA_LLM_BASE_URL=base_url, LEGA_LLM_CACHE_MODE="off")
+    env.setdefault("GROQ_API_KEY", "stub")
+
+    report = run_benchmark(args.modes, args.runs, args.idle, env)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[💾] Report written to {args.output}")
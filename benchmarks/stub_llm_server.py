@@ -0,0 +1,184 @@
+# benchmarks/stub_llm_server.py
+
+"""
+Local stand-in for an OpenAI-compatible chat completions API.
+
+Replies are generated locally with a configurable time-to-first-token and
+token rate, with or without streaming, so the trial pipeline can be
+benchmarked on a machine with no network access.
+
+Usage:
+    python -m benchmarks.stub_llm_server --port 8808 --latency 0.3 --tokens-per-second 250
+    LEGA_LLM_BASE_URL=http://127.0.0.1:8808/v1 GROQ_API_KEY=stub streamlit run frontend/streamlit_app.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "the accused section offence evidence court prosecution defence witness "
+    "burden proof intention knowledge hurt grievous punishment procedure arrest "
+    "cognizable bailable admissible relevant fact charge trial verdict guilty"
+).split()
+
+
+class StubOptions:
+    """
+    Behaviour of the stub server.
+
+    Args:
+        latency (float): Seconds before the first token (or the whole reply when not streaming)
+        tokens_per_second (float): Generation rate after the first token; 0 means instant
+        reply_tokens (int): Tokens per reply, capped by the request's max_tokens
+        jitter (float): Relative random variation applied to latency and token gaps
+    """
+
+    def __init__(self, latency=0.2, tokens_per_second=200.0, reply_tokens=200, jitter=0.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.jitter = jitter
+
+    def vary(self, seconds):
+        if not self.jitter:
+            return seconds
+        return max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+def make_reply(messages, length):
+    """Deterministic filler reply: the same request always gets the same words."""
+    seed = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).digest()
+    rng = random.Random(seed)
+    return [rng.choice(WORDS) for _ in range(length)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    options = StubOptions()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = request.get("messages", [])
+        length = min(self.options.reply_tokens, request.get("max_tokens") or self.options.reply_tokens)
+        words = make_reply(messages, length)
+        prompt_tokens = sum(len(message.get("content", "").split()) for message in messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = request.get("model", "stub")
+
+        time.sleep(self.options.vary(self.options.latency))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": length, "total_tokens": prompt_tokens + length}
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self._stream_reply(completion_id, model, words, usage if include_usage else None)
+            return
+
+        if self.options.tokens_per_second:
+            time.sleep(self.options.vary(max(0, length - 1) / self.options.tokens_per_second))
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    def _stream_reply(self, completion_id, model, words, usage=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(delta, finish_reason=None, usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else []
+            }
+            if usage:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send({"role": "assistant", "content": ""})
+        for position, word in enumerate(words):
+            if position and self.options.tokens_per_second:
+                time.sleep(self.options.vary(1 / self.options.tokens_per_second))
+            send({"content": word if position == 0 else " " + word})
+        send({}, finish_reason="stop")
+        if usage:
+            # Like the OpenAI API with stream_options.include_usage: a final chunk with no choices
+            send(None, usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_stub_server(host="127.0.0.1", port=0, options=None):
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one
+        options (StubOptions): Latency and token-rate settings
+    Returns:
+        tuple: (server, base URL to pass as LEGA_LLM_BASE_URL)
+    """
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"options": options or StubOptions()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Generation rate after the first token")
+    parser.add_argument("--reply-tokens", type=int, default=200, help="Tokens per reply, capped by max_tokens")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative random variation of the delays")
+    args = parser.parse_args()
+
+    options = StubOptions(args.latency, args.tokens_per_second, args.reply_tokens, args.jitter)
+    server, base_url = start_stub_server(args.host, args.port, options)
+    print(f"[🧪] Stub LLM server listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,124 @@
+# benchmarks/trial_latency.py
+
+"""
+End-to-end trial latency benchmark.
+
+Runs run_trial N times and reports p50/p95/p99 latency per stage and per
+trial, plus throughput. By default the agents talk to the bundled stub server
+(benchmarks/stub_llm_server.py), so results only depend on this machine:
+retrieval, prompt building, HTTP and streaming overhead. The LLM response
+cache is bypassed and the rate limiter lifted for the run.
+
+Usage:
+    python -m benchmarks.trial_latency --trials 20 --concurrency 2 --latency 0.2 --tokens-per-second 200
+    python -m benchmarks.trial_latency --base-url http://127.0.0.1:8808/v1 --output latency.json
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_llm_server import StubOptions, start_stub_server
+from backend.utils.helpers import percentile
+
+SCENARIOS = [
+    "A man caused grievous hurt with a weapon.",
+    "A shopkeeper was found selling adulterated food that caused illness.",
+    "The accused entered a house at night and stole jewellery.",
+    "A public servant accepted a bribe to issue a licence.",
+    "A driver killed a pedestrian while driving rashly."
+]
+
+
+def summarize(samples):
+    """p50/p95/p99/mean of a list of seconds, rounded to milliseconds."""
+    return {
+        "p50": round(percentile(samples, 50), 3),
+        "p95": round(percentile(samples, 95), 3),
+        "p99": round(percentile(samples, 99), 3),
+        "mean": round(sum(samples) / len(samples), 3) if samples else 0.0
+    }
+
+
+def run_benchmark(trials, concurrency=1, warmup=1):
+    """
+    Run trials against whatever LEGA_LLM_BASE_URL points to.
+
+    Returns:
+        dict: Per-stage and total latency summaries and throughput
+    """
+    # Imported after the environment is set up so the agents pick up the base URL
+    from backend.core import CourtroomSimulator
+    from backend.rate_limiter import configure_rate_limiter
+
+    configure_rate_limiter()
+    CourtroomSimulator().warm_up()
+    for i in range(warmup):
+        CourtroomSimulator().run_trial(SCENARIOS[i % len(SCENARIOS)])
+
+    def run_one(i):
+        simulator = CourtroomSimulator()
+        start = time.perf_counter()
+        simulator.run_trial(SCENARIOS[i % len(SCENARIOS)])
+        return time.perf_counter() - start, simulator.last_stage_timings
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(run_one, range(trials)))
+    wall_time = time.perf_counter() - start
+
+    stages = {}
+    for _, timings in results:
+        for name, timing in timings.items():
+            stages.setdefault(name, []).append(timing["duration"])
+
+    return {
+        "trials": trials,
+        "concurrency": concurrency,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_per_min": round(60 * trials / wall_time, 2),
+        "total": summarize([latency for latency, _ in results]),
+        "stages": {name: summarize(samples) for name, samples in stages.items()}
+    }
+
+
+def print_report(report):
+    print(f"\n{'stage':<20}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}{'mean s':>10}")
+    rows = list(report["stages"].items()) + [("total", report["total"])]
+    for name, stats in rows:
+        print(f"{name:<20}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['p99']:>10.3f}{stats['mean']:>10.3f}")
+    print(f"\n[📊] {report['trials']} trials at concurrency {report['concurrency']} in {report['wall_time_s']}s "
+          f"-> {report['throughput_per_min']} trials/min")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end trial latency")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1, help="Trials run in parallel")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed trials run first")
+    parser.add_argument("--base-url", help="Use an already running OpenAI-compatible server instead of the bundled stub")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub: seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Stub: generation rate")
+    parser.add_argument("--reply-tokens", type=int, default=200, help="Stub: tokens per reply")
+    parser.add_argument("--output", help="Optional JSON report path")
+    args = parser.parse_args()
+
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        _, base_url = start_stub_server(options=StubOptions(args.latency, args.tokens_per_second, args.reply_tokens))
+        print(f"[🧪] Stub LLM server listening on {base_url}")
+
+    os.environ["LEGA_LLM_BASE_URL"] = base_url
+    os.environ["LEGA_LLM_CACHE_MODE"] = "off"
+    os.environ.setdefault("GROQ_API_KEY", "stub")
+
+    report = run_benchmark(args.trials, args.concurrency, args.warmup)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[💾] Report written to {args.output}")
@@ -5,11 +5,12 @@ import os
 sys.path.append(os.path.abspath("."))  
 
 import streamlit as st
-from backend.core import CourtroomSimulator
+from backend.core import CourtroomSimulator, TrialError
+from backend.registry import warm_up_in_background
+from backend.utils.config_loader import get_app_settings, get_retrieval_service_url
 from backend.utils.helpers import truncate_text
 import time
 import json
-from openai import OpenAI
 
 
 # Page configuration
@@ -79,12 +80,45 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Trial stage -> (live panel label, status line, result key holding the agent's text)
+TRIAL_STAGES = {
+    "prosecution": ("👨‍⚖️ Prosecution", "👨‍⚖️ Prosecution building case...", "argument"),
+    "defense": ("🧑‍⚖️ Defense", "🧑‍⚖️ Defense preparing argument...", "argument"),
+    "cross_examination": ("🔍 Cross-Examination", "🔍 Cross-examination in progress...", "questions"),
+    "verdict": ("⚖️ Verdict", "⚖️ Judge deliberating verdict...", "verdict")
+}
+
+@st.cache_resource
+def start_warm_up():
+    """
+    Start loading the embedding model and indexes once per server process,
+    so they are ready by the time the first trial is submitted.
+
+    Skipped when retrieval is served by the shared retrieval service.
+    """
+    if not get_app_settings()["background_warm_up"] or get_retrieval_service_url():
+        return None
+    return warm_up_in_background()
+
+@st.cache_resource
+def get_simulator():
+    """
+    Shared CourtroomSimulator for every session of this server process.
+
+    The agents hold no per-trial state and read the API key per request, so
+    one instance serves all reruns and sessions (its last_stage_timings are
+    those of the process's latest trial).
+    """
+    return CourtroomSimulator()
+
 def validate_groq_api_key(api_key):
     """Validate if the provided Groq API key works."""
     if not api_key or not api_key.startswith('gsk_'):
         return False, "API key should start with 'gsk_'"
     
     try:
+        from openai import OpenAI
+
         client = OpenAI(
             api_key=api_key,
             base_url="https://api.groq.com/openai/v1"
@@ -250,6 +284,8 @@ def display_sidebar_info():
             st.session_state.crime_description = crime
 
 def main():
+    start_warm_up()
+
     # Initialize session state
     if 'groq_api_key' not in st.session_state:
         st.session_state.groq_api_key = ''
@@ -334,38 +370,55 @@ def main():
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            # Simulate trial with progress updates
+            # Stream the trial: each agent's reply renders as it is generated
             try:
                 status_text.text("🏛️ Initializing courtroom...")
-                progress_bar.progress(10)
-                time.sleep(1)
-                
-                simulator = CourtroomSimulator()
-                
-                status_text.text("👨‍⚖️ Prosecution building case...")
-                progress_bar.progress(30)
-                time.sleep(1)
+                simulator = get_simulator()
                 
-                status_text.text("🧑‍⚖️ Defense preparing argument...")
-                progress_bar.progress(60)
-                time.sleep(1)
+                placeholders = {}
+                for stage, (label, _, _) in TRIAL_STAGES.items():
+                    with st.expander(label, expanded=True):
+                        placeholders[stage] = st.empty()
                 
-                status_text.text("🔍 Cross-examination in progress...")
-                progress_bar.progress(80)
-                time.sleep(1)
+                live_text = {stage: "" for stage in TRIAL_STAGES}
+                last_render = {stage: 0.0 for stage in TRIAL_STAGES}
+                running = []
+                completed = 0
+                trial_result = None
                 
-                status_text.text("⚖️ Judge deliberating verdict...")
-                progress_bar.progress(90)
+                for event in simulator.stream_trial(crime_description):
+                    stage = event.get("stage")
+                    if event["type"] == "stage_start":
+                        running.append(stage)
+                        status_text.text(" | ".join(TRIAL_STAGES[name][1] for name in running))
+                    
+                    elif event["type"] == "token":
+                        live_text[stage] += event["text"]
+                        # Throttle redraws; every redraw is a websocket message
+                        if time.monotonic() - last_render[stage] > 0.1:
+                            placeholders[stage].markdown(live_text[stage])
+                            last_render[stage] = time.monotonic()
+                    
+                    elif event["type"] == "stage_complete":
+                        running.remove(stage)
+                        completed += 1
+                        progress_bar.progress(int(100 * completed / len(TRIAL_STAGES)))
+                        placeholders[stage].markdown(event["result"][TRIAL_STAGES[stage][2]])
+                        if running:
+                            status_text.text(" | ".join(TRIAL_STAGES[name][1] for name in running))
+                    
+                    elif event["type"] == "trial_complete":
+                        trial_result = event["result"]
                 
-                trial_result = simulator.run_trial(crime_description)
-                
-                progress_bar.progress(100)
                 status_text.text("✅ Trial completed successfully!")
-                time.sleep(1)
                 
                 # Clear progress
                 progress_container.empty()
                 
+            except TrialError as e:
+                label = TRIAL_STAGES[e.stage][0] if e.stage in TRIAL_STAGES else e.stage
+                st.error(f"❌ Trial stopped during {label}: {str(e.error)}")
+                return
             except Exception as e:
                 st.error(f"❌ Trial simulation failed: {str(e)}")
                 return
@@ -0,0 +1,37 @@
+# tests/test_batch_runner.py
+
+import asyncio
+import json
+from backend.batch_runner import run_batch, scenario_id
+
+class FlakySimulator:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.calls = []
+
+    async def run_trial_async(self, crime_description):
+        self.calls.append(crime_description)
+        if crime_description in self.fail_on:
+            raise RuntimeError("upstream timeout")
+        return {"crime_description": crime_description, "verdict": "Acquitted"}
+
+def test_resume_skips_completed_trials(tmp_path):
+    output = str(tmp_path / "transcripts.jsonl")
+    scenarios = [{"crime_description": f"Case {i}"} for i in range(4)]
+
+    first = asyncio.run(run_batch(scenarios, output, concurrency=2, simulator=FlakySimulator(fail_on={"Case 2"})))
+    assert first["completed"] == 3 and first["failed"] == 1
+
+    # Simulate a crash mid-write, then resume: only the failed trial reruns
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "partial"')
+    retry = FlakySimulator()
+    second = asyncio.run(run_batch(scenarios, output, concurrency=2, simulator=retry))
+
+    assert retry.calls == ["Case 2"], "Completed trials should not rerun"
+    assert second["skipped"] == 3 and second["completed"] == 1
+
+    with open(output, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    completed = [json.loads(line)["id"] for line in lines if '"completed"' in line]
+    assert sorted(completed) == sorted(scenario_id(s) for s in scenarios)
@@ -0,0 +1,29 @@
+# tests/test_context_packer.py
+
+from backend.context_packer import ContextPacker
+
+def test_pack_fills_budget_in_score_order_without_duplicates():
+    packer = ContextPacker("judge")
+    murder = "Whoever commits murder shall be punished with death or imprisonment for life, and shall also be liable to fine."
+    sections = [
+        {"doc_type": "IPC", "section_id": "300", "title": "Murder", "content": "Culpable homicide is murder if the act is done with the intention of causing death. " * 40, "score": 0.4},
+        {"doc_type": "IPC", "section_id": "302", "title": "Punishment for murder", "content": murder + "\nContents ........ 12\n", "score": 0.1},
+        {"doc_type": "IPC", "section_id": "302", "title": "Punishment for murder", "content": murder, "score": 0.2},
+        {"doc_type": "IPC", "section_id": "302A", "title": "Punishment for murder", "content": murder, "score": 0.3}
+    ]
+
+    context = packer.pack(sections, budget=120)
+
+    assert context.startswith("[IPC Section 302]"), "Best-scoring section should come first"
+    assert context.count(murder) == 1, "Duplicate and overlapping sections should be dropped"
+    assert "........" not in context, "Table-of-contents lines should be removed"
+    assert "[IPC Section 300]" in context and context.endswith("..."), "Overflowing section should be truncated to fit"
+    assert packer.tokenizer.count(context) <= 120, "Context should stay within the token budget"
+
+
+def test_tokenizer_loads_on_first_use():
+    packer = ContextPacker("defense")
+    assert packer._tokenizer is None, "Constructing an agent should not load the tokenizer"
+
+    packer.truncate("word " * 10, max_tokens=100)
+    assert packer._tokenizer is not None
@@ -11,4 +11,82 @@ def test_run_trial():
     assert result["prosecution"]["argument"], "Prosecution should return non-empty argument"
     assert result["defense"]["argument"], "Defense should return non-empty argument"
     assert result["cross_examination"]["questions"], "Cross-Examiner should ask questions"
-    assert result["verdict"]["verdict"], "Judge should deliver a verdict"
\ No newline at end of file
+    assert result["verdict"]["verdict"], "Judge should deliver a verdict"
+
+def test_stage_scheduler_runs_independent_stages_concurrently():
+    import time
+    from backend.core import Stage, StageScheduler
+
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    scheduler = StageScheduler([
+        Stage("a", slow, ["x"]),
+        Stage("b", slow, ["x"]),
+        Stage("c", lambda a, b: a + b, ["a", "b"])
+    ])
+    values, timings = scheduler.run({"x": 1})
+
+    assert values["c"] == 2, "Dependent stage should receive both inputs"
+    assert timings["c"]["start"] < 0.35, "Independent stages should overlap"
+
+
+def test_run_trial_async():
+    import asyncio
+
+    simulator = CourtroomSimulator()
+    result = asyncio.run(simulator.run_trial_async("A man caused grievous hurt with a weapon."))
+
+    assert set(result) == {"crime_description", "prosecution", "defense", "cross_examination", "verdict", "trace"}
+    assert result["verdict"]["verdict"], "Judge should deliver a verdict"
+
+
+def test_stage_scheduler_emits_progress_events():
+    from backend.core import Stage, StageScheduler
+
+    def speak(value, on_token=None):
+        for word in ["guilty", " as", " charged"]:
+            on_token(word)
+        return value
+
+    events = []
+    StageScheduler([Stage("verdict", speak, ["x"], streams=True)]).run({"x": 1}, on_event=events.append)
+
+    assert [e["type"] for e in events] == ["stage_start", "token", "token", "token", "stage_complete"]
+    assert "".join(e["text"] for e in events if e["type"] == "token") == "guilty as charged"
+
+
+def test_trace_follows_stages_into_worker_threads():
+    from backend.core import Stage, StageScheduler
+    from backend.metrics import metrics
+    from backend.tracing import start_trace, span, record_usage
+
+    class Usage:
+        prompt_tokens, completion_tokens = 120, 30
+
+    def argue(value):
+        with span("search"):
+            pass
+        with span("llm_call") as llm_span:
+            record_usage(llm_span, Usage())
+        return value
+
+    with start_trace() as trace:
+        StageScheduler([Stage("prosecution", argue, ["x"]), Stage("defense", argue, ["x"])]).run({"x": 1})
+    summary = trace.to_dict()
+
+    assert set(summary["stages"]) == {"prosecution", "defense"}, "Spans should be attributed to their stage"
+    assert set(summary["stages"]["defense"]["seconds"]) == {"search", "llm_call"}
+    assert summary["prompt_tokens"] == 240 and summary["completion_tokens"] == 60
+    assert 'lega_stage_seconds_count{stage="prosecution"}' in metrics.render()
+
+
+def test_importing_core_defers_heavy_dependencies():
+    import subprocess
+    import sys
+
+    code = "import sys, backend.core; print(' '.join(m for m in ('faiss', 'openai', 'httpx', 'sentence_transformers', 'torch') if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+
+    assert not loaded, f"Importing backend.core should not load {loaded}"
@@ -10,3 +10,56 @@ def test_build_vectorstore():
 
     assert index.ntotal > 0, "FAISS index should contain vectors"
 
+
+
+def test_create_index_types():
+    import numpy as np
+    from backend.embedding_manager import create_index, INDEX_TYPES
+    from backend.utils.config_loader import VECTOR_INDEX_DEFAULTS
+
+    vectors = np.random.default_rng(0).normal(size=(500, 64)).astype("float32")
+    for index_type in INDEX_TYPES:
+        index, search_params = create_index(vectors, dict(VECTOR_INDEX_DEFAULTS, type=index_type))
+        _, ids = index.search(vectors[:5], 1)
+
+        assert index.ntotal == 500, f"{index_type} index should hold every vector"
+        assert (ids[:, 0] == np.arange(5)).mean() >= 0.8, f"{index_type} should find most self-matches"
+        assert index_type in ("flat", "sq_fp16", "sq_int8") or search_params, "ANN indexes should persist search parameters"
+
+
+def test_incremental_rebuild_skips_unchanged_index(tmp_path):
+    import os
+    import shutil
+    from backend.embedding_manager import SectionEmbeddingCache
+
+    json_path = str(tmp_path / "evidence_act_sections.json")
+    save_path = str(tmp_path / "evidence_act_vectorstore.faiss")
+    shutil.copy("data/processed/evidence_act_sections.json", json_path)
+    cache = SectionEmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+
+    build_vectorstore(json_path, save_path=save_path, cache=cache)
+    first_write = os.path.getmtime(save_path)
+    index = build_vectorstore(json_path, save_path=save_path, cache=cache)
+
+    assert index.ntotal > 0, "Unchanged rebuild should return the existing index"
+    assert os.path.getmtime(save_path) == first_write, "Unchanged rebuild should not rewrite the index"
+
+
+def test_sq_int8_index_reranks_against_full_vectors(tmp_path):
+    import numpy as np
+    from backend.registry import get_vectors_path, load_index_meta
+    from backend.retriever import rerank_exact
+    from backend.utils.config_loader import VECTOR_INDEX_DEFAULTS
+
+    save_path = str(tmp_path / "ipc_vectorstore.faiss")
+    settings = dict(VECTOR_INDEX_DEFAULTS, type="sq_int8", rerank_factor=4)
+    index = build_vectorstore("data/processed/ipc_sections.json", save_path=save_path, index_settings=settings)
+    vectors = np.load(get_vectors_path(save_path), mmap_mode="r")
+
+    assert load_index_meta(save_path)["rerank_factor"] == 4, "Re-rank factor should be persisted with the index"
+    assert vectors.shape == (index.ntotal, index.d), "Full-precision vectors should be saved for re-ranking"
+
+    queries = np.array(vectors[:5])
+    _, candidates = index.search(queries, 8)
+    distances, ids = rerank_exact(vectors, queries, candidates)
+    assert (ids[:, 0] == np.arange(5)).all() and (distances[:, 0] == 0).all(), "Re-ranking should restore exact self-matches"
@@ -0,0 +1,26 @@
+# tests/test_llm_cache.py
+
+import pytest
+from backend.llm_cache import LLMResponseCache, LLMCacheMissError, request_key
+
+MESSAGES = [{"role": "user", "content": "Is theft under IPC 378 bailable?"}]
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    key = request_key(MESSAGES, "llama3-70b-8192", 0.3, 512)
+
+    LLMResponseCache(path, mode="record").put(key, "Recorded verdict")
+    replay = LLMResponseCache(path, mode="replay", ttl_seconds=1)
+
+    assert replay.get(key) == "Recorded verdict", "Replay should serve recorded replies"
+    with pytest.raises(LLMCacheMissError):
+        replay.get(request_key(MESSAGES, "llama3-70b-8192", 0.5, 512))
+
+
+def test_lru_eviction(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "responses.sqlite"), max_entries=2)
+    for i in range(3):
+        cache.put(f"key-{i}", f"reply {i}")
+
+    assert cache.get("key-0") is None, "Oldest entry should be evicted"
+    assert cache.stats()["entries"] == 2
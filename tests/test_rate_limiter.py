@@ -0,0 +1,31 @@
+# tests/test_rate_limiter.py
+
+from backend.rate_limiter import TokenBucket
+from backend.llm_client import _backoff_delay
+
+SETTINGS = {"max_retries": 3, "backoff_base_seconds": 1.0, "backoff_max_seconds": 30.0}
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers or {})
+
+def test_token_bucket_queues_callers_beyond_capacity():
+    bucket = TokenBucket(capacity=2, rate=10)
+
+    assert bucket.reserve(1) == 0.0 and bucket.reserve(1) == 0.0, "Burst up to capacity should not wait"
+    assert 0.05 < bucket.reserve(1) <= 0.1, "Next caller waits for one unit to refill"
+    assert 0.15 < bucket.reserve(1) <= 0.2, "Callers queue behind earlier reservations"
+
+def test_backoff_honours_retry_after_and_gives_up():
+    delay = _backoff_delay(FakeAPIError(429, {"retry-after": "7"}), 0, SETTINGS)
+    assert 7.0 <= delay <= 8.0, "Retry-After should set the minimum delay"
+
+    assert 0.0 <= _backoff_delay(FakeAPIError(503), 2, SETTINGS) <= 4.0, "Backoff grows with the attempt"
+    assert _backoff_delay(FakeAPIError(429), 3, SETTINGS) is None, "Retries should stop at max_retries"
+    assert _backoff_delay(FakeAPIError(401), 0, SETTINGS) is None, "Auth errors are not retried"
@@ -0,0 +1,61 @@
+# tests/test_registry.py
+
+from backend.registry import ResourceRegistry
+from backend.retriever import LegalRetriever
+
+def test_retrievers_share_resources():
+    registry = ResourceRegistry()
+    first = LegalRetriever(document_type="ipc", registry=registry)
+    second = LegalRetriever(document_type="ipc", registry=registry)
+
+    assert first.model is second.model, "Embedding model should be loaded once"
+    assert first.index is second.index, "FAISS index should be loaded once per document type"
+    assert first.sections is second.sections, "Sections should be parsed once per document type"
+
+    registry.release()
+    assert registry.status() == {"models": [], "corpora": []}, "Release should drop all cached resources"
+
+def test_index_model_mismatch_is_rejected():
+    import faiss
+    import pytest
+    from backend.registry import IndexModelMismatchError, check_index_model
+
+    index = faiss.IndexFlatL2(384)
+    check_index_model("ipc.faiss", index, {"model_name": "all-MiniLM-L6-v2@onnx_int8"}, "all-MiniLM-L6-v2@onnx_int8", 384)
+
+    with pytest.raises(IndexModelMismatchError):
+        check_index_model("ipc.faiss", index, {"model_name": "bert-base-nli-mean-tokens"}, "all-MiniLM-L6-v2@onnx_int8")
+    with pytest.raises(IndexModelMismatchError):
+        check_index_model("ipc.faiss", index, {}, "bert-base-nli-mean-tokens", 768)
+
+def test_registry_switches_corpus_bundles_without_dropping_retrievers(tmp_path):
+    import json
+    import shutil
+    import pytest
+    from backend.corpus_bundle import BundleError, activate_bundle, open_bundle, publish_bundle
+
+    bundles_dir = str(tmp_path)
+    first = publish_bundle(["ipc"], bundles_dir=bundles_dir)
+    assert publish_bundle(["ipc"], bundles_dir=bundles_dir) == first, "Unchanged files should not publish a new bundle"
+
+    registry = ResourceRegistry({"bundles": {"dir": bundles_dir, "verify_checksums": True, "poll_seconds": 0}})
+    old = LegalRetriever(document_type="ipc", registry=registry)
+    assert old.bundle_version == first and old.index_path.startswith(bundles_dir), "Corpus should load from the active bundle"
+
+    # A second version of the same files, activated while the old retriever is in use
+    second = "second"
+    shutil.copytree(tmp_path / first, tmp_path / second)
+    manifest_path = tmp_path / second / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest_path.write_text(json.dumps(dict(manifest, version=second)))
+    activate_bundle(second, bundles_dir)
+
+    assert registry.switch_bundle(), "Registry should switch to the newly activated bundle"
+    assert registry.bundle_version == second
+    new = LegalRetriever(document_type="ipc", registry=registry)
+    assert new.index is not old.index, "New retrievers should use the new bundle's corpus"
+    assert old.retrieve("punishment for murder", top_k=2), "Retrievers created before the switch should keep working"
+
+    (tmp_path / second / "ipc_sections.json").write_text("[]")
+    with pytest.raises(BundleError):
+        open_bundle(second, bundles_dir).verify("ipc")
@@ -0,0 +1,57 @@
+# tests/test_retrieval_service.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.registry import ResourceRegistry
+from backend.retrieval_service import start_retrieval_service
+from backend.retriever import LegalRetriever, retrieve_across
+
+def test_remote_retriever_matches_local_and_batches_concurrent_queries(tmp_path):
+    registry = ResourceRegistry()
+    queries = ["punishment for murder", "theft in a dwelling house", "criminal intimidation", "grievous hurt"]
+    local = retrieve_across([("ipc", query, 2) for query in queries], registry=registry)
+
+    for options in ({"port": 0}, {"socket_path": str(tmp_path / "retrieval.sock")}):
+        server, url = start_retrieval_service(window_ms=50, registry=registry, **options)
+        try:
+            remote = LegalRetriever(document_type="ipc", service_url=url)
+            assert remote.model is None, "Remote retrievers should not load the model"
+
+            with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+                results = list(pool.map(lambda query: remote.retrieve(query, top_k=2), queries))
+
+            assert [[r["section_id"] for r in res] for res in results] == [[r["section_id"] for r in res] for res in local]
+            health = remote.client.health()
+            assert health["requests"] == len(queries) and health["batches"] < len(queries), "Concurrent queries should share batches"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_remote_timeout_is_not_retried():
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import pytest
+    from backend.retrieval_client import RetrievalClient, RetrievalServiceError
+
+    calls = []
+
+    class SlowHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            calls.append(self.path)
+            time.sleep(0.5)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = RetrievalClient(f"http://127.0.0.1:{server.server_port}", timeout=0.1)
+        with pytest.raises(RetrievalServiceError, match="timed out"):
+            client.retrieve_across([("ipc", "punishment for murder", 2)])
+        assert calls == ["/retrieve"], "A timed-out request should not be sent again"
+    finally:
+        server.shutdown()
+        server.server_close()
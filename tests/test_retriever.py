@@ -7,4 +7,118 @@ def test_retriever():
     results = retriever.retrieve("punishment for murder", top_k=1)
 
     assert len(results) == 1, "Should return one result"
-    assert results[0]["section_id"] == "302", "Section 302 should match murder query"
\ No newline at end of file
+    assert results[0]["section_id"] == "302", "Section 302 should match murder query"
+
+def test_retrieve_many_matches_single_queries():
+    retriever = LegalRetriever(document_type="ipc")
+    queries = ["punishment for murder", "theft in a dwelling house", "criminal intimidation"]
+
+    batched = retriever.retrieve_many(queries, top_k=2)
+    single = [retriever.retrieve(query, top_k=2) for query in queries]
+
+    assert [[r["section_id"] for r in res] for res in batched] == [[r["section_id"] for r in res] for res in single]
+
+
+def test_cross_act_retrieval_is_ranked_by_score():
+    retriever = LegalRetriever(document_type="all")
+    results = retriever.retrieve("burden of proof in a murder trial", top_k=5)
+
+    scores = [r["score"] for r in results]
+    assert len(results) == 5, "Should return five results across all acts"
+    assert scores == sorted(scores), "Cross-act results should be ordered by distance"
+
+
+def test_query_embedding_cache_survives_restart(tmp_path):
+    import numpy as np
+    from backend.retriever import QueryEmbeddingCache
+
+    class CountingModel:
+        calls = 0
+
+        def encode(self, texts):
+            CountingModel.calls += 1
+            return np.ones((len(texts), 4), dtype="float32")
+
+    path = str(tmp_path / "queries.sqlite")
+    QueryEmbeddingCache("test-model", path).encode(CountingModel(), ["burden of proof"])
+    cache = QueryEmbeddingCache("test-model", path)
+    cache.encode(CountingModel(), ["burden  of proof"])
+
+    assert CountingModel.calls == 1, "Second process should reuse the stored embedding"
+    assert cache.stats()["disk_hits"] == 1
+    assert QueryEmbeddingCache("other-model", path).encode(CountingModel(), ["burden of proof"]).shape == (1, 4)
+    assert CountingModel.calls == 2, "Changing the model should invalidate the store"
+
+
+def test_gold_set_report():
+    from benchmarks.retrieval_report import load_gold, evaluate
+
+    gold = load_gold()
+    assert len(gold) >= 300, "Gold set should cover a few hundred citations"
+    assert {record["doc_type"] for record in gold} == {"ipc", "crpc", "evidence_act"}
+
+    row = evaluate("crpc", [record for record in gold if record["doc_type"] == "crpc"][:20])
+    assert 0.0 <= row["recall@1"] <= row["recall@10"] <= 1.0, "Recall should grow with k"
+    assert row["index_kb"] > 0 and row["search_p50_ms"] >= 0
+
+
+def test_citation_query_skips_encoder():
+    from backend.lexical_index import parse_citation
+
+    class NoEncodeModel:
+        def encode(self, texts):
+            raise AssertionError("Exact citations should not be encoded")
+
+    assert parse_citation("s. 154 CrPC") == {"section_ids": ["154"], "act": "crpc", "exact": True}
+    assert parse_citation("punishment under section 302 for murder")["exact"] is False
+    assert parse_citation("burden of proof") is None
+
+    retriever = LegalRetriever(document_type="crpc")
+    retriever.model = NoEncodeModel()
+    results = retriever.retrieve("s. 154 CrPC", top_k=1)
+
+    assert results[0]["section_id"] == "154" and results[0]["score"] == 0.0, "Cited section should be looked up directly"
+
+
+def test_hybrid_fusion_ranks_across_acts():
+    import faiss
+    import numpy as np
+    from backend.lexical_index import LexicalIndex
+    from backend.registry import Corpus
+
+    def corpus(document_type, rows):
+        sections = [{"section_id": str(i), "title": text, "content": text} for i, (text, _) in enumerate(rows)]
+        index = faiss.IndexFlatL2(2)
+        index.add(np.array([[x, 0.0] for _, x in rows], dtype="float32"))
+        return Corpus(document_type, index, sections, lexical=LexicalIndex.from_sections(sections))
+
+    # CrPC holds the three closest vectors and the best BM25 matches; IPC's best section
+    # only wins inside its own act, so a per-act fusion would wrongly rank it first
+    corpora = {
+        "ipc": corpus("ipc", [("punishment", 3.0), ("unrelated offence", 4.0)]),
+        "crpc": corpus("crpc", [("punishment for murder", 0.1), ("murder punishment procedure", 0.2),
+                                ("punishment of murder", 0.3)] + [(f"filler clause {i}", 5.0 + i) for i in range(7)])
+    }
+
+    class Model:
+        def encode(self, texts):
+            return np.zeros((len(texts), 2), dtype="float32")
+
+    class Registry:
+        model_name = "test-model"
+        settings = {"unified_index": False, "filter_oversample": 4, "query_cache": {"enabled": False},
+                    "hybrid": {"enabled": True, "candidates": 20, "rrf_k": 60}}
+
+        def get_model(self):
+            return Model()
+
+        def corpus_names(self):
+            return list(corpora)
+
+        def get_corpus(self, name):
+            return corpora[name]
+
+    results = LegalRetriever(document_type="all", registry=Registry()).retrieve("punishment for murder", top_k=4)
+
+    assert [(r["doc_type"], r["section_id"]) for r in results] == [("CRPC", "0"), ("CRPC", "1"), ("CRPC", "2"), ("IPC", "0")], \
+        "Hybrid results should be fused once across acts"
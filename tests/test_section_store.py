@@ -0,0 +1,17 @@
+# tests/test_section_store.py
+
+import json
+from backend.section_store import SectionStore, write_section_store, section_store_is_current
+
+def test_section_store_round_trip(tmp_path):
+    json_path = str(tmp_path / "ipc_sections.json")
+    with open("data/processed/ipc_sections.json", "r", encoding="utf-8") as f:
+        sections = json.load(f)
+
+    write_section_store(sections, json_path)
+    store = SectionStore(json_path)
+
+    assert section_store_is_current(json_path), "Store without a newer JSON should be current"
+    assert len(store) == len(sections), "Store should hold every section"
+    assert store[42] == sections[42], "Records should decode to the original sections"
+    assert store[-1] == sections[-1], "Negative indices should behave like a list"
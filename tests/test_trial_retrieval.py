@@ -0,0 +1,26 @@
+# tests/test_trial_retrieval.py
+
+from backend.core import CourtroomSimulator
+from backend.registry import ResourceRegistry
+from backend.retriever import retrieve_across
+from backend.trial_retrieval import trial_retrieval
+
+def test_agents_share_one_search_per_query():
+    registry = ResourceRegistry()
+    simulator = CourtroomSimulator()
+    crime = "A man caused grievous hurt with a weapon."
+
+    with trial_retrieval(registry) as retrieval:
+        retrieval.prefetch(simulator._plan_retrieval(crime))
+        prosecution = simulator.prosecutor._retrieve_sections(crime)
+        defense = simulator.defense._retrieve_sections(crime)
+        wider = retrieval.retrieve_across([("ipc", crime, 1), ("ipc", crime, 3)])
+
+    direct = retrieve_across([("ipc", crime, 3)], registry=registry)[0]
+    assert [s["section_id"] for s in prosecution[:2]] == [s["section_id"] for s in defense[:2]], "Shared query should give both agents the same sections"
+    assert [s["section_id"] for s in wider[1]] == [s["section_id"] for s in direct], "Widened search should match a direct search"
+    assert wider[0] == wider[1][:1], "Narrower requests should get a prefix of the widest search"
+
+    stats = retrieval.stats()
+    assert stats["batches"] == 2, "Planned requests should be fetched in one batch, the widened one in another"
+    assert stats["searched"] == 6, "Duplicate (act, query) pairs should be searched once"
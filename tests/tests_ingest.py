@@ -16,4 +16,18 @@ def test_extract_sections():
     assert "content" in sections[0], "Each section should have content"
     
 # Run this after placing ipc_raw.pdf in the data/ folder. 
-    
\ No newline at end of file
+    
+
+def test_streaming_split_matches_full_text_split():
+    import re
+    from backend.ingest import iter_raw_sections
+
+    pages = [
+        "Preamble text\nSection 1. Short title.\nSection 2. Definitions continue",
+        "onto the next page.\nSee section",
+        "302 for murder.\nSection 3. Extent."
+    ]
+    pattern = r"(?i)(?=\bsection\s+\d+)"
+
+    full_text = "".join(page + "\n" for page in pages)
+    assert list(iter_raw_sections(pages, pattern)) == re.split(pattern, full_text)